@@ -0,0 +1,220 @@
+"""
+Reproducible benchmark suite for the Shorts pipeline.
+
+Generates synthetic content_pool pages across a grid of page height,
+element count and animation density, runs the full pipeline against local
+TTS / LLM stand-ins and writes machine-readable results.
+
+    python benchmarks/run_benchmarks.py                 # full grid
+    python benchmarks/run_benchmarks.py --quick         # single cell
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/bench_<sha>.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import platform
+import argparse
+import itertools
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+
+from synthetic import generate_page
+from stubs import start_stub_server
+
+# Pages must live under the repo root: that is what the recorder's server serves.
+POOL_DIR = os.path.join(BENCH_DIR, ".pool")
+OUTPUT_DIR = os.path.join(BENCH_DIR, ".output")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+GRID = {
+    "height": [3000, 12000],
+    "elements": [24, 240],
+    "density": [0.0, 0.5],
+}
+QUICK_GRID = {"height": [3000], "elements": [24], "density": [0.5]}
+
+ENCODE_FPS = 30  # matches editor.assemble_video
+
+# metric -> True if higher is better
+COMPARED_METRICS = {
+    "e2e_s": False,
+    "realtime_factor": False,
+    "capture_fps": True,
+    "capture_unique_fps": True,
+    "encode_fps": True,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def stage_wall(profiler, folder, stage):
+    return sum(r["wall_s"] for r in profiler.records if r["folder"] == folder and r["stage"] == stage)
+
+
+def video_fps(path):
+    """
+    Frame rate actually recorded in 'path': (all frames / s, distinct frames / s).
+    The screencast repeats the last frame when the page can't keep up, so the
+    distinct-frame rate is the one that drops on an expensive page.
+    """
+    if not os.path.exists(path):
+        return None, None
+    import imageio_ffmpeg  # ships with moviepy
+    frames, secs = imageio_ffmpeg.count_frames_and_secs(path)
+    if not secs:
+        return None, None
+    proc = subprocess.run(
+        [imageio_ffmpeg.get_ffmpeg_exe(), "-hide_banner", "-i", path, "-vf", "mpdecimate", "-vsync", "vfr", "-f", "null", "-"],
+        capture_output=True, text=True
+    )
+    unique = [int(m) for m in re.findall(r"frame=\s*(\d+)", proc.stderr)]
+    unique_fps = round(unique[-1] / secs, 2) if unique else None
+    return round(frames / secs, 2), unique_fps
+
+
+def run_cell(name):
+    # Imported lazily: the env vars pointing at the stubs must be set first.
+    from main import process_folder, folder_paths
+    from profiler import start_profiler
+
+    # Outputs of an earlier invocation must not stand in for this run's
+    paths = folder_paths(name, POOL_DIR, OUTPUT_DIR)
+    for key in ("raw_video", "voiceover", "final_video", "meta_file"):
+        if os.path.exists(paths[key]):
+            os.remove(paths[key])
+
+    profiler = start_profiler(enabled=True)
+    error = None
+    try:
+        with profiler.folder_scope(name):
+            result = process_folder(name, content_pool=POOL_DIR, output_dir=OUTPUT_DIR) or {}
+    except Exception as e:
+        # A failed cell is reported (ok: false), not allowed to abort the grid
+        result, error = {}, repr(e)
+
+    # process_folder keeps intermediates by default, so the raw capture is still there
+    capture_fps, capture_unique_fps = None, None
+    if result.get("final_video"):
+        capture_fps, capture_unique_fps = video_fps(paths["raw_video"])
+
+    duration = result.get("duration") or 0
+    e2e = stage_wall(profiler, name, "folder")
+    record = stage_wall(profiler, name, "record")
+    encode = stage_wall(profiler, name, "encode")
+    browser = profiler.metrics.get(name, {})
+    return {
+        "name": name,
+        "ok": bool(result.get("final_video")),
+        "error": error,
+        "video_s": round(duration, 2),
+        "e2e_s": round(e2e, 2),
+        "record_s": round(record, 2),
+        "encode_s": round(encode, 2),
+        "realtime_factor": round(record / duration, 3) if duration else None,
+        "capture_fps": capture_fps,
+        "capture_unique_fps": capture_unique_fps,
+        "page_fps": browser.get("page_fps"),
+        "page_height": browser.get("page_height"),
+        "encode_fps": round(duration * ENCODE_FPS / encode, 2) if encode and duration else None,
+        "stages": {r["stage"]: r["wall_s"] for r in profiler.records if r["folder"] == name},
+        "browser": browser,
+    }
+
+
+def compare(current, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {r["name"]: r for r in baseline.get("results", [])}
+    regressions = 0
+    print(f"\nComparing against {baseline.get('commit')} ({baseline_path})")
+    for r in current["results"]:
+        prev = old.get(r["name"])
+        if not prev:
+            continue
+        # A failing cell finishes early and would otherwise look like a speedup
+        if prev.get("ok") and not r.get("ok"):
+            regressions += 1
+            print(f"   {r['name']:<28} {'ok':<16} {'True':>9} -> {'False':<9} {'':>6} REGRESSION ({r.get('error')})")
+            continue
+        if not prev.get("ok") or not r.get("ok"):
+            continue  # no valid timings on one side
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            a, b = prev.get(metric), r.get(metric)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            worse = change < -threshold if higher_is_better else change > threshold
+            flag = "REGRESSION" if worse else ""
+            regressions += worse
+            print(f"   {r['name']:<28} {metric:<16} {a:>9} -> {b:<9} {change:+.1%} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="Run a single grid cell")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/bench_<commit>.json)")
+    parser.add_argument("--compare", help="Baseline results file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change flagged as regression")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Simulated TTS/LLM latency (s)")
+    args = parser.parse_args()
+
+    server, stub_url = start_stub_server(latency=args.stub_latency)
+    os.environ["OPENROUTER_API_KEY"] = "benchmark-stub"
+    os.environ["OPENROUTER_BASE_URL"] = f"{stub_url}/api/v1"
+    os.environ["TTS_ENDPOINT"] = f"{stub_url}/tts"
+    os.environ["PROFILING"] = "1"
+
+    os.makedirs(POOL_DIR, exist_ok=True)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    grid = QUICK_GRID if args.quick else GRID
+    cells = list(itertools.product(grid["height"], grid["elements"], grid["density"]))
+    results = []
+    for height, elements, density in cells:
+        name = generate_page(POOL_DIR, height, elements, density)
+        print(f"\n⏱  Benchmark {name}")
+        results.append(run_cell(name))
+    server.shutdown()
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "grid": grid,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'cell':<28} {'e2e_s':>8} {'rt_factor':>10} {'cap_fps':>8} {'enc_fps':>8}")
+    for r in results:
+        print(f"{r['name']:<28} {r['e2e_s']:>8} {str(r['realtime_factor']):>10} "
+              f"{str(r['capture_fps']):>8} {str(r['encode_fps']):>8}")
+    print(f"\n📄 Results written to {output}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold)
+        if regressions:
+            print(f"\n❌ {regressions} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
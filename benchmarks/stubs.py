@@ -0,0 +1,75 @@
+import io
+import json
+import time
+import wave
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Deterministic stand-ins for ElevenLabs (TTS) and OpenRouter (LLM), so that
+# benchmark timings measure our pipeline and not third-party latency.
+
+WORDS_PER_SECOND = 2.5
+SAMPLE_RATE = 22050
+
+STUB_HOOKS = {
+    "overlay_header": "BENCHMARK RUN",
+    "overlay_text": "SYNTHETIC CONTENT",
+    "cta_text": "NO ACTION",
+    "cta_subtext": "LOCAL STUB",
+    "title": "Benchmark - Synthetic Content",
+    "description": "Generated by the local benchmark stub.",
+    "tags": "#benchmark"
+}
+
+
+def silent_wav(seconds):
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(b"\x00\x00" * int(seconds * SAMPLE_RATE))
+    return buf.getvalue()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.0  # simulated per-request latency (seconds)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.path.endswith("/chat/completions"):
+            content = "```json\n" + json.dumps(STUB_HOOKS) + "\n```"
+            body = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]})
+            self._send(body.encode(), "application/json")
+        elif self.path.endswith("/tts"):
+            words = len(payload.get("text", "").split())
+            self._send(silent_wav(max(1.0, words / WORDS_PER_SECOND)), "audio/wav")
+        else:
+            self.send_error(404)
+
+
+def start_stub_server(latency=0.0):
+    """
+    Starts the stub server on a free port in a daemon thread.
+    Returns (server, base_url).
+    """
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,74 @@
+import os
+import json
+import random
+
+# Animation building blocks, cheapest to most expensive to composite
+ANIMATIONS = [
+    "@keyframes a0 { 0%{opacity:.4} 50%{opacity:1} 100%{opacity:.4} }",
+    "@keyframes a1 { 0%{transform:translateY(0)} 50%{transform:translateY(-12px)} 100%{transform:translateY(0)} }",
+    "@keyframes a2 { 0%{transform:rotate(0) scale(1)} 50%{transform:rotate(3deg) scale(1.04)} 100%{transform:rotate(0) scale(1)} }",
+    "@keyframes a3 { 0%{filter:blur(0);box-shadow:0 0 0 rgba(0,0,0,.2)} 50%{filter:blur(1px);box-shadow:0 20px 40px rgba(0,0,0,.4)} 100%{filter:blur(0);box-shadow:0 0 0 rgba(0,0,0,.2)} }",
+]
+
+# ~2.5 words per second at the stub TTS rate -> ~20 s narration
+NARRATION = " ".join(["This synthetic page measures capture and encode throughput."] * 6)
+
+
+def page_name(height, elements, density):
+    return f"bench_h{height}_e{elements}_d{int(density * 100)}"
+
+
+def generate_page(pool_dir, height, elements, density, seed=0):
+    """
+    Writes a self-contained content_pool entry (index.html + script.json).
+    height: total page height in px, elements: number of cards,
+    density: fraction (0-1) of cards that run a CSS animation.
+    No external assets, so runs are reproducible offline.
+    """
+    rng = random.Random(seed)
+    name = page_name(height, elements, density)
+    folder = os.path.join(pool_dir, name)
+    os.makedirs(folder, exist_ok=True)
+
+    sections = max(1, min(8, elements // 10 or 1))
+    per_section = max(1, elements // sections)
+    # Fixed section heights (overflow clipped) so the page is exactly 'height'
+    # px tall whatever the card count; the last section takes the remainder.
+    section_h = height // sections
+
+    body = []
+    for s in range(sections):
+        cards = []
+        for c in range(per_section):
+            style = ""
+            if rng.random() < density:
+                anim = rng.randrange(len(ANIMATIONS))
+                style = f' style="animation:a{anim} {1.5 + rng.random() * 2:.2f}s ease-in-out infinite"'
+            hue = rng.randrange(360)
+            cards.append(
+                f'<div class="card"{style}><h3>Card {s}.{c}</h3>'
+                f'<div class="swatch" style="background:hsl({hue},70%,60%)"></div>'
+                f'<button>Action</button></div>'
+            )
+        h = height - section_h * (sections - 1) if s == sections - 1 else section_h
+        body.append(
+            f'<section class="section" style="height:{h}px">'
+            f'<h2>Section {s}</h2><div class="grid">{"".join(cards)}</div></section>'
+        )
+
+    html = f"""<!DOCTYPE html><html><head><meta charset="utf-8"><title>{name}</title><style>
+body {{ margin:0; font-family:sans-serif; background:#f4f4f4; }}
+section {{ padding:60px 40px; box-sizing:border-box; overflow:hidden; }}
+.grid {{ display:grid; grid-template-columns:repeat(3, 1fr); gap:20px; }}
+.card {{ background:#fff; border-radius:12px; padding:20px; box-shadow:0 4px 12px rgba(0,0,0,.1); }}
+.swatch {{ height:80px; border-radius:8px; margin:10px 0; }}
+{chr(10).join(ANIMATIONS)}
+</style></head><body>
+{"".join(body)}
+</body></html>
+"""
+    with open(os.path.join(folder, "index.html"), "w") as f:
+        f.write(html)
+    with open(os.path.join(folder, "script.json"), "w") as f:
+        json.dump({"narration": NARRATION, "video_duration_override": 20}, f, indent=4)
+    return name
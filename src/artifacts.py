@@ -0,0 +1,124 @@
+import os
+import time
+import shutil
+
+from journal import temp_path, cleanup_temp_files
+
+# Output storage policy: promote artifacts by rename/hard link instead of
+# copying, drop intermediates once the downstream stage has committed, and keep
+# the batch inside a disk budget so a runner never fills its disk.
+
+# Optional cap on the size of output/ (MB). Unset = no cap.
+OUTPUT_BUDGET_MB = float(os.getenv("OUTPUT_BUDGET_MB", "0")) or None
+# Free space that must always remain on the output volume (MB).
+MIN_FREE_MB = float(os.getenv("MIN_FREE_MB", "1024"))
+# Per-folder estimate used until a folder has actually been measured (MB).
+DEFAULT_FOLDER_ESTIMATE_MB = 200
+
+MB = 1024 * 1024
+
+
+def footprint(paths):
+    """Bytes on disk used by 'paths'; hard-linked files (same inode) count once."""
+    seen, total = set(), 0
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if (st.st_dev, st.st_ino) not in seen:
+            seen.add((st.st_dev, st.st_ino))
+            total += st.st_size
+    return total
+
+
+class ArtifactManager:
+    def __init__(self, output_dir, keep_intermediates=False, budget_mb=OUTPUT_BUDGET_MB,
+                 min_free_mb=MIN_FREE_MB, wait_s=0, poll_s=10):
+        self.output_dir = output_dir
+        self.keep_intermediates = keep_intermediates
+        self.budget = budget_mb * MB if budget_mb else None
+        self.min_free = min_free_mb * MB
+        self.wait_s = wait_s
+        self.poll_s = poll_s
+        self.folder_estimate = DEFAULT_FOLDER_ESTIMATE_MB * MB
+        self._measured = False
+
+    def promote(self, src, dst):
+        """
+        Publishes src as dst without copying bytes. When intermediates are kept,
+        dst is a hard link (copy only if the filesystem can't link); otherwise src
+        is renamed. Either way dst appears atomically.
+        """
+        if not self.keep_intermediates:
+            os.replace(src, dst)
+            return
+        tmp = temp_path(dst)
+        try:
+            os.link(src, tmp)
+        except OSError:
+            shutil.copy(src, tmp)
+        os.replace(tmp, dst)
+
+    def release(self, *paths):
+        """Removes intermediates whose downstream stage has committed."""
+        if self.keep_intermediates:
+            return 0
+        freed = 0
+        for path in paths:
+            if path and os.path.exists(path):
+                freed += os.path.getsize(path)
+                os.remove(path)
+        if freed:
+            print(f"   🧹 Released {freed / MB:.1f} MB of intermediates")
+        return freed
+
+    def usage(self):
+        return footprint(os.path.join(root, name) for root, _, files in os.walk(self.output_dir) for name in files)
+
+    def observe_folder(self, bytes_written):
+        """Updates the per-folder estimate (largest folder seen this run); see footprint()."""
+        if bytes_written <= 0:
+            return
+        if self._measured:
+            self.folder_estimate = max(self.folder_estimate, bytes_written)
+        else:
+            self.folder_estimate = bytes_written
+            self._measured = True
+
+    def has_room(self):
+        free = shutil.disk_usage(self.output_dir).free
+        if free - self.folder_estimate < self.min_free:
+            return False
+        if self.budget and self.usage() + self.folder_estimate > self.budget:
+            return False
+        return True
+
+    def reclaim(self):
+        """Drops leftovers of interrupted work: temp artifacts and orphaned browser captures."""
+        removed = cleanup_temp_files(self.output_dir)
+        for name in os.listdir(self.output_dir):
+            if name.endswith(".webm"):
+                os.remove(os.path.join(self.output_dir, name))
+                removed += 1
+        return removed
+
+    def wait_for_room(self):
+        """
+        Called by the scheduler before each folder. Returns True when the next folder
+        fits; otherwise reclaims, waits up to wait_s for space, and returns False
+        so the batch pauses before the disk fills.
+        """
+        if self.has_room():
+            return True
+        self.reclaim()
+        deadline = time.time() + self.wait_s
+        while not self.has_room():
+            if time.time() >= deadline:
+                free = shutil.disk_usage(self.output_dir).free
+                budget = f"{self.budget / MB:.0f} MB" if self.budget else "none"
+                print(f"⏸  Disk budget reached (output: {self.usage() / MB:.0f} MB, budget: {budget}, "
+                      f"free: {free / MB:.0f} MB, next folder needs ~{self.folder_estimate / MB:.0f} MB)")
+                return False
+            time.sleep(self.poll_s)
+        return True
@@ -1,9 +1,7 @@
-from elevenlabs import generate, save, set_api_key
 import os
 import json
-from dotenv import load_dotenv
 
-load_dotenv()
+# NOTE: elevenlabs is imported lazily in generate_voiceover(); .env is loaded by main.py
 
 def get_api_key():
     """
@@ -22,6 +20,30 @@ def get_api_key():
     # For now, we return the first one, but the structure allows expansion.
     return keys[0]
 
+def get_api_key_id():
+    """
+    Non-secret identifier of the key generate_voiceover() will use
+    (index + short hash), for the run ledger.
+    """
+    import hashlib
+    if os.getenv("TTS_ENDPOINT"):
+        return "tts-endpoint"
+    key = get_api_key()
+    if not key:
+        return None
+    return f"elevenlabs#0:{hashlib.sha256(key.encode()).hexdigest()[:8]}"
+
+def synthesize_local(text: str, output_path: str, endpoint: str):
+    """
+    Plain HTTP TTS stand-in (used by the benchmark suite).
+    POSTs {"text": ...} and saves the returned audio bytes as-is.
+    """
+    import requests
+    response = requests.post(endpoint, json={"text": text}, timeout=30)
+    response.raise_for_status()
+    with open(output_path, 'wb') as f:
+        f.write(response.content)
+
 def generate_voiceover(script_path: str, output_path: str):
     """
     Reads the script.json, generates audio using ElevenLabs, 
@@ -34,20 +56,27 @@ def generate_voiceover(script_path: str, output_path: str):
     if not text:
         raise ValueError("No narration text found in script.json")
 
-    api_key = get_api_key()
-    if api_key:
-        set_api_key(api_key)
+    # TTS_ENDPOINT swaps ElevenLabs for a local stand-in (benchmarks)
+    tts_endpoint = os.getenv("TTS_ENDPOINT")
+    if not tts_endpoint:
+        from elevenlabs import generate, save, set_api_key
+        api_key = get_api_key()
+        if api_key:
+            set_api_key(api_key)
     
     print(f"Generating voiceover for: {text[:30]}...")
     
     try:
-        audio = generate(
-            text=text,
-            voice="Bella", # Or any other high quality voice
-            model="eleven_monolingual_v1"
-        )
-        
-        save(audio, output_path)
+        if tts_endpoint:
+            synthesize_local(text, output_path, tts_endpoint)
+        else:
+            audio = generate(
+                text=text,
+                voice="Bella", # Or any other high quality voice
+                model="eleven_monolingual_v1"
+            )
+            
+            save(audio, output_path)
         
         # Determine duration using MoviePy (since we have it as dependency)
         # or just simple estimation if we want to avoid loading heavy libs here.
@@ -3,6 +3,9 @@ import random
 import json
 import requests
 
+# Overridable so benchmarks can point the pipeline at a local stand-in
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1").rstrip("/")
+
 # Fallback Metadata if AI fails or no key provided
 VIRAL_TEMPLATES = {
     "headers": [
@@ -66,7 +69,7 @@ def generate_viral_hooks(script_text: str = ""):
                 "messages": [{"role": "user", "content": prompt}]
             }
             
-            response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=5)
+            response = requests.post(f"{OPENROUTER_BASE_URL}/chat/completions", headers=headers, json=payload, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -130,7 +133,7 @@ def generate_upload_metadata(script_text: str, hooks: dict):
                 "messages": [{"role": "user", "content": prompt}]
             }
             
-            response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload, timeout=5)
+            response = requests.post(f"{OPENROUTER_BASE_URL}/chat/completions", headers=headers, json=payload, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1,4 +1,3 @@
-from moviepy.editor import VideoFileClip, AudioFileClip, CompositeVideoClip
 import os
 
 def assemble_video(video_path: str, audio_path: str, output_path: str):
@@ -6,6 +5,9 @@ def assemble_video(video_path: str, audio_path: str, output_path: str):
     Combines the recorded video and the generated audio.
     Time-stretches video to match audio duration.
     """
+    # moviepy.editor pulls in imageio/numpy; only pay for it when assembling
+    from moviepy.editor import VideoFileClip, AudioFileClip
+
     print(f"Assembling video: {video_path} + {audio_path}")
     
     if not os.path.exists(video_path) or not os.path.exists(audio_path):
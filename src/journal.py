@@ -0,0 +1,163 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+
+# Temp artifacts look like ".final_x.<pid>.tmp.mp4": hidden, and the real
+# extension stays last so ffmpeg/MoviePy still pick the right container.
+TEMP_MARKER = ".tmp"
+
+
+def temp_path(path):
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(directory, f".{stem}.{os.getpid()}{TEMP_MARKER}{ext}")
+
+
+@contextmanager
+def atomic_output(path):
+    """
+    Yields a temp path to write 'path' into. On success the temp file is renamed
+    over 'path' in one step, so readers never see a truncated artifact.
+    On error the temp file is removed. If nothing was written, 'path' is untouched.
+    """
+    tmp = temp_path(path)
+    try:
+        yield tmp
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if os.path.exists(tmp):
+        os.replace(tmp, path)
+
+
+def write_json_atomic(path, data, **kwargs):
+    with atomic_output(path) as tmp:
+        with open(tmp, 'w') as f:
+            json.dump(data, f, **kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def cleanup_temp_files(directory):
+    """Removes temp artifacts left behind by a killed run."""
+    removed = 0
+    if not os.path.isdir(directory):
+        return removed
+    for name in os.listdir(directory):
+        if name.startswith(".") and TEMP_MARKER in name:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+    return removed
+
+
+class Journal:
+    """
+    Append-only per-run log of stage events (JSON lines):
+        {"event": "run", "batch": [...]}
+        {"event": "start"|"commit"|"fail", "folder": ..., "stage": ..., ...}
+    Each line is fsynced, so after a crash the journal tells exactly which
+    stages committed. A torn last line is ignored on replay.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.batch = []
+        self._committed = {}  # folder -> {stage: entry}
+        self.failures = {}    # folder -> last failure reason
+        self.timings = {}     # folder -> {stage: wall_s}, stages run in this session only
+        self._torn = False
+        if os.path.exists(path):
+            self._replay()
+
+    @classmethod
+    def create(cls, journal_dir, batch):
+        os.makedirs(journal_dir, exist_ok=True)
+        # Milliseconds + pid keep two runs started in the same second apart
+        now = time.time()
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(now))
+        name = f"run_{stamp}_{int(now * 1000) % 1000:03d}_{os.getpid()}"
+        path, n = os.path.join(journal_dir, f"{name}.jsonl"), 0
+        while os.path.exists(path):
+            n += 1
+            path = os.path.join(journal_dir, f"{name}_{n}.jsonl")
+        journal = cls(path)
+        journal.batch = list(batch)
+        journal._append({"event": "run", "batch": journal.batch})
+        return journal
+
+    @classmethod
+    def latest(cls, journal_dir):
+        if not os.path.isdir(journal_dir):
+            return None
+        runs = sorted(f for f in os.listdir(journal_dir) if f.startswith("run_") and f.endswith(".jsonl"))
+        return cls(os.path.join(journal_dir, runs[-1])) if runs else None
+
+    def _replay(self):
+        with open(self.path, 'r') as f:
+            for line in f:
+                self._torn = not line.endswith("\n")
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crash
+                self._apply(entry)
+
+    def _apply(self, entry):
+        event = entry.get("event")
+        if event == "run":
+            self.batch = entry.get("batch", [])
+        elif event == "commit":
+            self._committed.setdefault(entry["folder"], {})[entry["stage"]] = entry
+        elif event == "fail":
+            self._committed.get(entry["folder"], {}).pop(entry["stage"], None)
+            self.failures[entry["folder"]] = f"{entry['stage']}: {entry.get('reason')}"
+
+    def _append(self, entry):
+        entry["ts"] = time.time()
+        with open(self.path, 'a') as f:
+            if self._torn:
+                f.write("\n")  # terminate the torn line so this entry stays parseable
+                self._torn = False
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._apply(entry)
+        if entry.get("wall_s") is not None:
+            self.timings.setdefault(entry["folder"], {})[entry["stage"]] = entry["wall_s"]
+
+    def start(self, folder, stage):
+        self._append({"event": "start", "folder": folder, "stage": stage})
+
+    def commit(self, folder, stage, data=None, artifacts=(), wall_s=None, fingerprints=None):
+        """fingerprints: {path: [size, sha256]} taken at commit, before anything is released."""
+        self._append({"event": "commit", "folder": folder, "stage": stage,
+                      "data": data or {}, "artifacts": list(artifacts), "wall_s": wall_s,
+                      "fingerprints": fingerprints or {}})
+
+    def fail(self, folder, stage, reason, wall_s=None):
+        self._append({"event": "fail", "folder": folder, "stage": stage, "reason": reason, "wall_s": wall_s})
+
+    def entry(self, folder, stage):
+        """Returns the commit entry for 'stage' even if its artifacts were since released."""
+        return self._committed.get(folder, {}).get(stage)
+
+    def stage_timings(self, folder):
+        """{stage: wall_s} of the stages currently committed for 'folder' (any session)."""
+        return {stage: entry["wall_s"] for stage, entry in self._committed.get(folder, {}).items()
+                if entry.get("wall_s") is not None}
+
+    def fingerprint(self, folder, path):
+        """[size, sha256] recorded when 'path' was committed, or None."""
+        for entry in self._committed.get(folder, {}).values():
+            found = entry.get("fingerprints", {}).get(path)
+            if found:
+                return found
+        return None
+
+    def committed(self, folder, stage):
+        """Returns the commit entry if 'stage' committed and its artifacts still exist."""
+        entry = self._committed.get(folder, {}).get(stage)
+        if entry and all(os.path.exists(a) for a in entry.get("artifacts", [])):
+            return entry
+        return None
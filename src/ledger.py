@@ -0,0 +1,309 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import statistics
+
+from journal import write_json_atomic
+
+# Local run store. The SQLite file itself is not committed; the workflow commits
+# the compact JSON export instead and a fresh runner re-seeds from it.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    started_at  REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS folder_runs (
+    id          INTEGER PRIMARY KEY,
+    run_id      TEXT NOT NULL,
+    folder      TEXT NOT NULL,
+    started_at  REAL NOT NULL,
+    finished_at REAL,
+    outcome     TEXT,
+    reason      TEXT,
+    key_id      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_folder_runs_folder ON folder_runs(folder);
+CREATE INDEX IF NOT EXISTS idx_folder_runs_run ON folder_runs(run_id);
+CREATE TABLE IF NOT EXISTS stage_timings (
+    folder_run_id INTEGER NOT NULL,
+    stage         TEXT NOT NULL,
+    wall_s        REAL NOT NULL,
+    cpu_s         REAL,
+    peak_rss_mb   REAL
+);
+CREATE INDEX IF NOT EXISTS idx_stage_timings_run ON stage_timings(folder_run_id);
+CREATE TABLE IF NOT EXISTS artifacts (
+    folder_run_id INTEGER NOT NULL,
+    kind          TEXT NOT NULL,
+    path          TEXT NOT NULL,
+    size          INTEGER NOT NULL,
+    sha256        TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS published (
+    folder       TEXT PRIMARY KEY,
+    run_id       TEXT,
+    published_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+# How many folder runs the committed export keeps (enough for trend queries)
+EXPORT_FOLDER_RUNS = 500
+
+# Latest run slower than the median of earlier runs by this much is flagged
+REGRESSION_THRESHOLD = 0.20
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_published(db_path, export_path=None, legacy_history=None):
+    """
+    Published folders without creating or seeding anything: the SQLite store
+    opened read-only if it exists, else the JSON export, else a legacy history.json.
+    """
+    if os.path.exists(db_path):
+        try:
+            # Without a pending WAL the file is complete, and immutable=1 skips
+            # the -wal/-shm files a WAL reader would otherwise leave behind
+            immutable = "" if os.path.exists(db_path + "-wal") else "&immutable=1"
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro{immutable}", uri=True)
+            try:
+                return {row[0] for row in conn.execute("SELECT folder FROM published")}
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            pass  # unreadable without write access (WAL); the export is close enough
+    for path in (export_path, legacy_history):
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                try:
+                    data = json.load(f)
+                except ValueError:
+                    continue
+            return set(data.get("published", {}) if isinstance(data, dict) else data)
+    return set()
+
+
+class Ledger:
+    """
+    Indexed store of runs, per-folder outcomes, stage durations and artifact hashes.
+    On first open it seeds itself from the JSON export (or a legacy history.json).
+    """
+    def __init__(self, db_path, export_path=None, legacy_history=None):
+        self.db_path = db_path
+        self.export_path = export_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        fresh = not os.path.exists(db_path)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        if fresh:
+            if export_path and os.path.exists(export_path):
+                self.import_export(export_path)
+            elif legacy_history and os.path.exists(legacy_history):
+                self.import_legacy_history(legacy_history)
+
+    def close(self):
+        self.conn.close()
+
+    # --- Lookups ---
+
+    def is_published(self, folder):
+        return self.conn.execute("SELECT 1 FROM published WHERE folder = ?", (folder,)).fetchone() is not None
+
+    def published_folders(self):
+        return {row[0] for row in self.conn.execute("SELECT folder FROM published")}
+
+    # --- Recording ---
+
+    def start_run(self, run_id):
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO runs (run_id, started_at) VALUES (?, ?)", (run_id, time.time()))
+
+    def finish_run(self, run_id):
+        with self.conn:
+            self.conn.execute("UPDATE runs SET finished_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def begin_folder(self, run_id, folder):
+        """Returns the folder's row for this run; a resumed run reuses its earlier row."""
+        row = self.conn.execute(
+            "SELECT id FROM folder_runs WHERE run_id = ? AND folder = ? ORDER BY id DESC LIMIT 1",
+            (run_id, folder)
+        ).fetchone()
+        if row:
+            return row["id"]
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO folder_runs (run_id, folder, started_at) VALUES (?, ?, ?)",
+                (run_id, folder, time.time())
+            )
+        return cur.lastrowid
+
+    def finish_folder(self, folder_run_id, outcome, reason=None, key_id=None, stages=(), artifacts=None):
+        """
+        stages: timing records ({"stage", "wall_s"}, optionally "cpu_s" / "peak_rss_mb").
+        artifacts: {kind: path or (path, size, sha256)}; a bare path is hashed now
+        and skipped if missing (pass the tuple for files that were already released).
+        Marks the folder published when outcome == "published". Finishing a row
+        again (resume) replaces its timings and artifacts.
+        """
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT run_id, folder FROM folder_runs WHERE id = ?", (folder_run_id,)
+            ).fetchone()
+            self.conn.execute(
+                "UPDATE folder_runs SET finished_at = ?, outcome = ?, reason = ?, key_id = ? WHERE id = ?",
+                (time.time(), outcome, reason, key_id, folder_run_id)
+            )
+            self.conn.execute("DELETE FROM stage_timings WHERE folder_run_id = ?", (folder_run_id,))
+            self.conn.execute("DELETE FROM artifacts WHERE folder_run_id = ?", (folder_run_id,))
+            self.conn.executemany(
+                "INSERT INTO stage_timings (folder_run_id, stage, wall_s, cpu_s, peak_rss_mb) VALUES (?, ?, ?, ?, ?)",
+                [(folder_run_id, r["stage"], r["wall_s"], r.get("cpu_s"), r.get("peak_rss_mb")) for r in stages]
+            )
+            for kind, value in (artifacts or {}).items():
+                if isinstance(value, (tuple, list)):
+                    path, size, sha = value
+                elif value and os.path.exists(value):
+                    path, size, sha = value, os.path.getsize(value), file_sha256(value)
+                else:
+                    continue
+                self.conn.execute(
+                    "INSERT INTO artifacts (folder_run_id, kind, path, size, sha256) VALUES (?, ?, ?, ?, ?)",
+                    (folder_run_id, kind, os.path.basename(path), size, sha)
+                )
+            if outcome == "published":
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO published (folder, run_id, published_at) VALUES (?, ?, ?)",
+                    (row["folder"], row["run_id"], time.time())
+                )
+
+    # --- Export / import ---
+
+    def export(self, path=None):
+        """Writes the compact JSON export committed by the workflow."""
+        path = path or self.export_path
+        published = {
+            r["folder"]: [r["run_id"], round(r["published_at"], 1)]
+            for r in self.conn.execute("SELECT * FROM published ORDER BY folder")
+        }
+        folder_runs = []
+        rows = self.conn.execute(
+            "SELECT * FROM folder_runs ORDER BY started_at DESC, id DESC LIMIT ?", (EXPORT_FOLDER_RUNS,)
+        ).fetchall()
+        for r in reversed(rows):
+            stages = {}
+            for s in self.conn.execute("SELECT stage, wall_s FROM stage_timings WHERE folder_run_id = ?", (r["id"],)):
+                stages[s["stage"]] = round(stages.get(s["stage"], 0) + s["wall_s"], 3)
+            artifacts = {
+                a["kind"]: [a["path"], a["size"], a["sha256"]]
+                for a in self.conn.execute("SELECT * FROM artifacts WHERE folder_run_id = ?", (r["id"],))
+            }
+            folder_runs.append({
+                "run_id": r["run_id"], "folder": r["folder"], "started_at": round(r["started_at"], 1),
+                "outcome": r["outcome"], "reason": r["reason"], "key_id": r["key_id"],
+                "stages": stages, "artifacts": artifacts
+            })
+        write_json_atomic(path, {"version": 1, "published": published, "folder_runs": folder_runs},
+                          separators=(",", ":"))
+        return path
+
+    def import_export(self, path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        with self.conn:
+            for folder, (run_id, at) in data.get("published", {}).items():
+                self.conn.execute("INSERT OR REPLACE INTO published VALUES (?, ?, ?)", (folder, run_id, at))
+            for fr in data.get("folder_runs", []):
+                self.conn.execute("INSERT OR IGNORE INTO runs (run_id, started_at) VALUES (?, ?)",
+                                  (fr["run_id"], fr["started_at"]))
+                cur = self.conn.execute(
+                    "INSERT INTO folder_runs (run_id, folder, started_at, outcome, reason, key_id) VALUES (?, ?, ?, ?, ?, ?)",
+                    (fr["run_id"], fr["folder"], fr["started_at"], fr["outcome"], fr["reason"], fr["key_id"])
+                )
+                self.conn.executemany(
+                    "INSERT INTO stage_timings (folder_run_id, stage, wall_s) VALUES (?, ?, ?)",
+                    [(cur.lastrowid, stage, wall) for stage, wall in fr.get("stages", {}).items()]
+                )
+                self.conn.executemany(
+                    "INSERT INTO artifacts (folder_run_id, kind, path, size, sha256) VALUES (?, ?, ?, ?, ?)",
+                    [(cur.lastrowid, kind, *values) for kind, values in fr.get("artifacts", {}).items()]
+                )
+
+    def import_legacy_history(self, path):
+        """One-time migration from the old flat data/history.json list."""
+        with open(path, 'r') as f:
+            try:
+                folders = json.load(f)
+            except ValueError:
+                folders = []
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO published (folder, run_id, published_at) VALUES (?, 'legacy', ?)",
+                [(folder, time.time()) for folder in folders]
+            )
+
+    # --- Queries ---
+
+    def stage_trends(self, stage=None, last_runs=10):
+        """
+        Average wall time per stage for each of the last runs (oldest first).
+        Returns (run_ids, {stage: [avg or None per run]}).
+        """
+        run_ids = [r[0] for r in self.conn.execute(
+            "SELECT run_id FROM runs ORDER BY started_at DESC, run_id DESC LIMIT ?", (last_runs,)
+        )][::-1]
+        if not run_ids:
+            return [], {}
+        marks = ",".join("?" * len(run_ids))
+        query = f"""
+            SELECT fr.run_id, st.stage, AVG(st.wall_s) AS avg_wall
+            FROM stage_timings st JOIN folder_runs fr ON fr.id = st.folder_run_id
+            WHERE fr.run_id IN ({marks}) {"AND st.stage = ?" if stage else ""}
+            GROUP BY fr.run_id, st.stage
+        """
+        params = run_ids + ([stage] if stage else [])
+        trends = {}
+        for r in self.conn.execute(query, params):
+            trends.setdefault(r["stage"], [None] * len(run_ids))[run_ids.index(r["run_id"])] = r["avg_wall"]
+        return run_ids, trends
+
+    def folder_history(self, folder):
+        return self.conn.execute(
+            "SELECT run_id, started_at, finished_at, outcome, reason, key_id FROM folder_runs "
+            "WHERE folder = ? ORDER BY started_at, id", (folder,)
+        ).fetchall()
+
+
+def classify_outcome(result, error=None, failure=None):
+    """
+    Maps a process_folder() result to (outcome, reason).
+    error: exception raised while processing; failure: the journal's last failure reason.
+    """
+    if error is not None:
+        return "failed", repr(error)
+    if result is None:
+        return "skipped", "no index.html"
+    if result.get("final_video"):
+        return "published", None
+    return "failed", failure or "no final video"
+
+
+def is_regression(values, threshold=REGRESSION_THRESHOLD):
+    """True if the latest value is slower than the median of the earlier ones by > threshold."""
+    values = [v for v in values if v is not None]
+    if len(values) < 2:
+        return False
+    baseline = statistics.median(values[:-1])
+    return baseline > 0 and values[-1] > baseline * (1 + threshold)
@@ -1,169 +1,477 @@
 import os
 import json
-import asyncio
-from recorder import record_url
-from audio import generate_voiceover
-from editor import assemble_video
+import time
 import argparse
 
-from recorder import record_url, run_server_in_thread
-import shutil
-from creative import generate_viral_hooks, generate_upload_metadata
-import time
+from profiler import start_profiler, get_profiler
+from journal import Journal, atomic_output, write_json_atomic, cleanup_temp_files
+from ledger import Ledger, classify_outcome, is_regression, file_sha256, read_published
+from artifacts import ArtifactManager, OUTPUT_BUDGET_MB, footprint
+
+# NOTE: Heavy backends (Playwright, ElevenLabs, MoviePy, requests) are imported
+# inside the subcommands that need them, so `plan` stays instant.
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CONTENT_POOL = os.path.join(BASE_DIR, "content_pool")
 OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+DATA_DIR = os.path.join(BASE_DIR, "data")
+LEDGER_DB = os.path.join(DATA_DIR, "ledger.sqlite3")
+LEDGER_EXPORT = os.path.join(DATA_DIR, "ledger.json")
+LEGACY_HISTORY = os.path.join(DATA_DIR, "history.json")
+JOURNAL_DIR = os.path.join(OUTPUT_DIR, "journal")
 
-# Start Local Server (Daemon)
-try:
-    run_server_in_thread()
-    time.sleep(2) # Warmup
-except Exception as e:
-    print(f"Server start warning: {e}")
-
-def get_content_folders():
-    return [f for f in os.listdir(CONTENT_POOL) if os.path.isdir(os.path.join(CONTENT_POOL, f))]
-
-def main():
-    BATCH_SIZE = 3
-    
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-
-    previous_history = []
-    data_dir = os.path.join(BASE_DIR, "data")
-    if not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-    history_file = os.path.join(data_dir, "history.json")
-    
-    if os.path.exists(history_file):
-        with open(history_file, 'r') as f:
-            try:
-                previous_history = json.load(f)
-            except:
-                previous_history = []
-    
-    # Get all folders
+BATCH_SIZE = 3
+
+# Artifact kind (as stored in the ledger) -> folder_paths() key, outputs only
+OUTPUT_ARTIFACTS = {"raw": "raw_video", "voice": "voiceover", "final": "final_video", "metadata": "meta_file"}
+
+# Directory arguments default to None and resolve to the module paths at call
+# time, so every helper agrees on where a folder's files live.
+
+def get_content_folders(content_pool=None):
+    with os.scandir(content_pool or CONTENT_POOL) as entries:
+        return sorted(e.name for e in entries if e.is_dir())
+
+def open_ledger():
+    return Ledger(LEDGER_DB, export_path=LEDGER_EXPORT, legacy_history=LEGACY_HISTORY)
+
+def folder_paths(folder, content_pool=None, output_dir=None):
+    output_dir = output_dir or OUTPUT_DIR
+    folder_path = os.path.join(content_pool or CONTENT_POOL, folder)
+    return {
+        "folder": folder_path,
+        "index_html": os.path.join(folder_path, "index.html"),
+        "script_json": os.path.join(folder_path, "script.json"),
+        "raw_video": os.path.join(output_dir, f"raw_{folder}.mp4"),
+        "voiceover": os.path.join(output_dir, f"voice_{folder}.mp3"),
+        "final_video": os.path.join(output_dir, f"final_{folder}.mp4"),
+        "meta_file": os.path.join(output_dir, f"metadata_{folder}.json"),
+    }
+
+def select_folders(requested, run_all, batch_size, ledger=None):
+    """Resolves the folders a subcommand should work on."""
+    if requested:
+        return requested
+    folders = get_content_folders()
+    if run_all:
+        pending = folders
+    else:
+        ledger = ledger or open_ledger()
+        pending = [f for f in folders if not ledger.is_published(f)]
+    return pending[:batch_size]
+
+def outcome_stages(journal, folder, folder_s, profiler_records):
+    """
+    Stage timings for the ledger. Journaled stages are always timed, so trends
+    work with PROFILING=0; profiler sub-stages (tts, encode, ...) are added when on.
+    """
+    timed = journal.timings.get(folder, {})
+    # On resume, stages committed by the earlier session keep their recorded
+    # time, so the row (and the folder total) describes one complete attempt
+    carried = journal.stage_timings(folder)
+    for stage in timed:
+        carried.pop(stage, None)
+    timed = {**carried, **timed}
+    stages = [{"stage": stage, "wall_s": round(wall, 4)} for stage, wall in timed.items()]
+    stages.append({"stage": "folder", "wall_s": round(folder_s + sum(carried.values()), 4)})
+    stages += [r for r in profiler_records
+               if r["folder"] == folder and r["stage"] != "folder" and r["stage"] not in timed]
+    return stages
+
+def record_outcome(ledger, folder_run_id, folder, result, journal, stages, error=None):
+    """Stores one folder's outcome, stage timings and artifact hashes in the ledger."""
+    from audio import get_api_key_id
+    paths = folder_paths(folder)
+    outcome, reason = classify_outcome(result, error, journal.failures.get(folder))
+    # Intermediates are released after finalize, so prefer the journal's commit-time hashes
+    artifacts = {}
+    for kind, key in OUTPUT_ARTIFACTS.items():
+        fp = journal.fingerprint(folder, paths[key])
+        artifacts[kind] = (paths[key], *fp) if fp else paths[key]
+    ledger.finish_folder(
+        folder_run_id, outcome, reason=reason,
+        key_id=get_api_key_id() if result and result["has_audio"] else None,
+        stages=stages, artifacts=artifacts
+    )
+
+# --- Pipeline stages ---
+
+def load_script(paths):
+    if not os.path.exists(paths["script_json"]):
+        return {}
+    with open(paths["script_json"], 'r') as f:
+        return json.load(f)
+
+def run_audio(paths, script_data):
+    """
+    1. Script & Audio Strategy.
+    Returns (duration, has_audio).
+    """
+    profiler = get_profiler()
+    duration = 30 # Default
+    has_audio = False
+
+    narration = script_data.get("narration", "")
+    if narration and len(narration.strip()) > 5:
+        # Narrated Mode
+        from audio import generate_voiceover
+        try:
+            with profiler.stage("tts"), atomic_output(paths["voiceover"]) as tmp:
+                duration = generate_voiceover(paths["script_json"], tmp)
+                if duration <= 0 and os.path.exists(tmp):
+                    os.remove(tmp) # don't publish a partial voiceover
+            if duration > 0: has_audio = True
+        except Exception as e:
+            print(f"Audio failed, defaulting to Silent Mode: {e}")
+    elif script_data:
+        print("Silent Mode Active (Trend Music Strategy)")
+        duration = script_data.get("video_duration_override", 30)
+    return duration, has_audio
+
+def run_creative(paths, script_data):
+    """
+    2. Viral Hooks & Metadata.
+    Returns the overlay texts passed to the recorder.
+    """
+    from creative import generate_viral_hooks, generate_upload_metadata
+    profiler = get_profiler()
+    with profiler.stage("llm_hooks"):
+        hooks = generate_viral_hooks(script_data.get("narration", ""))
+
+    # Merge hooks
+    overlays = {
+        key: script_data.get(key) or hooks.get(key)
+        for key in ("overlay_text", "overlay_header", "cta_text", "cta_subtext")
+    }
+
+    # Save Metadata
+    with profiler.stage("llm_metadata"):
+        yt_meta = generate_upload_metadata(script_data.get("narration", ""), hooks)
+    write_json_atomic(paths["meta_file"], yt_meta, indent=2)
+    print(f"✅ Metadata saved to {paths['meta_file']}")
+    return overlays
+
+def run_record(paths, duration, overlays):
+    """
+    3. Record Video. Returns True if a new raw video was written.
+    Recorder errors propagate so the journal keeps the real cause.
+    """
+    import asyncio
+    from recorder import record_url
+    raw_video = paths["raw_video"]
+    print(f"Recording for {duration}s to {raw_video}...")
+    try:
+        with get_profiler().stage("record"), atomic_output(raw_video) as tmp:
+            asyncio.run(record_url(paths["index_html"], duration, tmp, **overlays))
+            return os.path.exists(tmp)
+    except Exception as e:
+        print(f"❌ RECORDING FAILED: {e}")  # the caller prints the traceback
+        raise
+
+def run_finalize(paths, has_audio, artifacts):
+    """4. Finalize: mux voiceover into the raw capture (or promote it as-is when silent)."""
+    profiler = get_profiler()
+    raw_video, voiceover, final_video = paths["raw_video"], paths["voiceover"], paths["final_video"]
+    if not os.path.exists(raw_video):
+        print(f"❌ Critical: Raw video file not found at {raw_video}")
+        return False
+
+    # Check file size
+    size = os.path.getsize(raw_video)
+    print(f"   Raw Video Created: {size} bytes")
+    if size < 1000:
+         print("⚠️ Warning: Video file is suspiciously small.")
+
+    if has_audio and os.path.exists(voiceover):
+        from editor import assemble_video
+        with profiler.stage("encode"), atomic_output(final_video) as tmp:
+            assemble_video(raw_video, voiceover, tmp)
+            return os.path.exists(tmp)
+
+    # Silent Finalization: the raw capture *is* the final video (rename/link, no copy)
+    with profiler.stage("silent_finalize"):
+        artifacts.promote(raw_video, final_video)
+    print(f"Silent video ready: {final_video}")
+    return True
+
+def journaled(journal, folder, stage, fn):
+    """
+    Runs one stage under the journal. fn() returns (data, artifacts) or None on failure.
+    A stage that already committed (with its artifacts on disk) is skipped and
+    its recorded data is returned instead.
+    """
+    if journal:
+        entry = journal.committed(folder, stage)
+        if entry:
+            print(f"   ↩️  {stage}: already committed, resuming past it")
+            return entry["data"]
+        journal.start(folder, stage)
+    started = time.perf_counter()
+    try:
+        result = fn()
+    except Exception as e:
+        if journal: journal.fail(folder, stage, repr(e), wall_s=time.perf_counter() - started)
+        raise
+    wall_s = time.perf_counter() - started
+    if result is None:
+        if journal: journal.fail(folder, stage, "no artifact produced", wall_s=wall_s)
+        return None
+    data, artifacts = result
+    if journal:
+        fingerprints = {p: [os.path.getsize(p), file_sha256(p)] for p in artifacts if os.path.isfile(p)}
+        journal.commit(folder, stage, data, artifacts, wall_s=wall_s, fingerprints=fingerprints)
+    return data
+
+def process_folder(folder, content_pool=None, output_dir=None, journal=None, artifacts=None):
+    """
+    Runs the full pipeline for one content folder.
+    With a journal, stages that already committed are skipped (resume).
+    Without an ArtifactManager, intermediates are kept.
+    Returns a small result dict (duration, has_audio, final_video) or None if skipped.
+    """
+    print(f"\n🎥 Processing: {folder}")
+    paths = folder_paths(folder, content_pool, output_dir)
+    artifacts = artifacts or ArtifactManager(output_dir or OUTPUT_DIR, keep_intermediates=True)
+
+    # Finished in an earlier attempt (its intermediates may already be released)
+    if journal and journal.committed(folder, "finalize"):
+        print("   ↩️  finalize: already committed, nothing to do")
+        audio = journal.entry(folder, "audio") or {"data": {}}
+        return {
+            "duration": audio["data"].get("duration"),
+            "has_audio": audio["data"].get("has_audio", False),
+            "final_video": paths["final_video"]
+        }
+
+    # Verify Paths
+    print(f"   path: {paths['folder']}")
+    print(f"   html: {paths['index_html']} (Exists: {os.path.exists(paths['index_html'])})")
+
+    if not os.path.exists(paths["index_html"]):
+        print(f"⚠️ Skipping {folder}: No index.html found at {paths['index_html']}")
+        return None
+
+    script_data = load_script(paths)
+
+    def audio_stage():
+        duration, has_audio = run_audio(paths, script_data)
+        artifacts = [paths["voiceover"]] if has_audio else []
+        return {"duration": duration, "has_audio": has_audio}, artifacts
+
+    audio = journaled(journal, folder, "audio", audio_stage)
+    overlays = journaled(journal, folder, "creative",
+                         lambda: (run_creative(paths, script_data), [paths["meta_file"]]))
+    duration, has_audio = audio["duration"], audio["has_audio"]
+
+    recorded = journaled(journal, folder, "record",
+                         lambda: ({}, [paths["raw_video"]]) if run_record(paths, duration, overlays) else None)
+    if recorded is not None:
+        finalized = journaled(journal, folder, "finalize",
+                              lambda: ({}, [paths["final_video"]]) if run_finalize(paths, has_audio, artifacts) else None)
+        if finalized is not None:
+            # Downstream committed: raw capture and voiceover are no longer needed
+            artifacts.observe_folder(footprint(paths[key] for key in OUTPUT_ARTIFACTS.values()))
+            artifacts.release(paths["raw_video"], paths["voiceover"])
+
+    return {
+        "duration": duration,
+        "has_audio": has_audio,
+        "final_video": paths["final_video"] if os.path.exists(paths["final_video"]) else None
+    }
+
+# --- Subcommands ---
+
+def cmd_plan(args):
+    # Read-only: plan must not create or seed the ledger
+    published = read_published(LEDGER_DB, LEDGER_EXPORT, LEGACY_HISTORY)
     folders = get_content_folders()
-    folders.sort()
-    
-    # Filter pending
-    # pending_folders = [f for f in folders if f not in previous_history]
-    
-    # DEBUG: Force Run All for Verification
-    print(f"DEBUG: All Folders: {folders}")
-    print(f"DEBUG: History: {previous_history}")
-    print("DEBUG: Forcing run of ALL folders to ensure artifact generation.")
-    pending_folders = folders 
-    
-    if not pending_folders:
+    pending = [f for f in folders if f not in published]
+    batch = (folders if args.all else pending)[:args.batch_size]
+    print(f"Content folders: {len(folders)} | Published: {len(folders) - len(pending)} | Pending: {len(pending)}")
+    for f in batch:
+        print(f"   next: {f}")
+    if len(pending) > len(batch) and not args.all:
+        print(f"   ... {len(pending) - len(batch)} more pending")
+
+def cmd_render(args):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    profiler = start_profiler()
+    ledger = open_ledger()
+
+    stale = cleanup_temp_files(OUTPUT_DIR)
+    if stale:
+        print(f"🧹 Removed {stale} partial artifact(s) from an interrupted run")
+
+    journal = Journal.latest(JOURNAL_DIR) if args.resume else None
+    if journal:
+        batch = args.folders or journal.batch
+        print(f"↩️  Resuming run {os.path.basename(journal.path)}")
+    else:
+        if args.resume:
+            print("No previous run journal found, starting a fresh run.")
+        batch = select_folders(args.folders, args.all, args.batch_size, ledger)
+    if not batch:
         print("No new content to process! All folders in history.")
         return
-
-    # Select Batch
-    batch = pending_folders[:BATCH_SIZE]
+    if not journal:
+        journal = Journal.create(JOURNAL_DIR, batch)
     print(f"🚀 Starting Batch Run: {len(batch)} videos ({batch})")
-    
+    artifacts = ArtifactManager(OUTPUT_DIR, keep_intermediates=args.keep_intermediates,
+                                budget_mb=args.disk_budget_mb, wait_s=args.disk_wait)
+
     # DEBUG: Create a token file to verify Output Write Access & Artifact Upload
     with open(os.path.join(OUTPUT_DIR, 'debug_token.txt'), 'w') as f:
-        f.write(f"Run started at {time.time()}\nBatch: {batch}\nExisting Output: {os.listdir(OUTPUT_DIR) if os.path.exists(OUTPUT_DIR) else 'None'}")
-    
-    for folder in batch:
-        print(f"\n🎥 Processing: {folder}")
-        folder_path = os.path.join(CONTENT_POOL, folder)
-        index_html = os.path.join(folder_path, "index.html")
-        script_json = os.path.join(folder_path, "script.json")
-        
-        # Verify Paths
-        print(f"   path: {folder_path}")
-        print(f"   html: {index_html} (Exists: {os.path.exists(index_html)})")
-        
-        # Output paths
-        raw_video = os.path.join(OUTPUT_DIR, f"raw_{folder}.mp4")
-        voiceover = os.path.join(OUTPUT_DIR, f"voice_{folder}.mp3")
-        final_video = os.path.join(OUTPUT_DIR, f"final_{folder}.mp4")
-        meta_file = os.path.join(OUTPUT_DIR, f"metadata_{folder}.json")
-
-        if not os.path.exists(index_html):
-            print(f"⚠️ Skipping {folder}: No index.html found at {index_html}")
-            continue
-
-        # ... (Script/Audio Logic skipped for brevity, keeps existing) ...
-        # 1. Script & Audio Strategy
-        script_data = {}
-        duration = 30 # Default
-        has_audio = False
-        
-        if os.path.exists(script_json):
-            with open(script_json, 'r') as f:
-                script_data = json.load(f)
-            
-            narration = script_data.get("narration", "")
-            if narration and len(narration.strip()) > 5:
-                # Narrated Mode
-                try:
-                    duration = generate_voiceover(script_json, voiceover)
-                    if duration > 0: has_audio = True
-                except Exception as e:
-                    print(f"Audio failed, defaulting to Silent Mode: {e}")
-            else:
-                print("Silent Mode Active (Trend Music Strategy)")
-                duration = script_data.get("video_duration_override", 30)
-
-        # 2. Viral Hooks & Metadata
-        hooks = generate_viral_hooks(script_data.get("narration", ""))
-        
-        # Merge hooks
-        overlay_text = script_data.get("overlay_text") or hooks.get("overlay_text")
-        overlay_header = script_data.get("overlay_header") or hooks.get("overlay_header")
-        cta_text = script_data.get("cta_text") or hooks.get("cta_text")
-        cta_subtext = script_data.get("cta_subtext") or hooks.get("cta_subtext")
-        
-        # Save Metadata
-        yt_meta = generate_upload_metadata(script_data.get("narration", ""), hooks)
-        with open(meta_file, 'w') as f:
-            json.dump(yt_meta, f, indent=2)
-        print(f"✅ Metadata saved to {meta_file}")
+        f.write(f"Run started at {time.time()}\nBatch: {batch}\nExisting Output: {os.listdir(OUTPUT_DIR)}")
+
+    run_id = os.path.splitext(os.path.basename(journal.path))[0]
+    ledger.start_run(run_id)
+    failed = []
+    try:
+        for i, folder in enumerate(batch):
+            if journal.committed(folder, "finalize"):
+                # Finished (and recorded) by the session that crashed; don't count it twice
+                print(f"\n↩️  {folder}: finalized earlier in this run, skipping")
+                continue
+            if not artifacts.wait_for_room():
+                print(f"⏸  Pausing batch before {folder}: {len(batch) - i} folder(s) left for `render --resume`.")
+                break
+            folder_run_id = ledger.begin_folder(run_id, folder)
+            first_record = len(profiler.records)
+            started = time.perf_counter()
+            result, error = None, None
+            try:
+                with profiler.folder_scope(folder):
+                    result = process_folder(folder, journal=journal, artifacts=artifacts)
+            except BaseException as e:
+                error = e
+                if not isinstance(e, Exception):
+                    raise  # Ctrl-C / SystemExit: record the folder, then stop the batch
+                # One broken folder must not take the rest of the batch down
+                print(f"❌ {folder} failed: {e!r}")
+                import traceback
+                traceback.print_exc()
+                failed.append(folder)
+            finally:
+                stages = outcome_stages(journal, folder, time.perf_counter() - started,
+                                        profiler.records[first_record:])
+                record_outcome(ledger, folder_run_id, folder, result, journal, stages, error)
+    finally:
+        # Export and profile even when the batch is interrupted
+        ledger.finish_run(run_id)
+        print(f"\n🗃  Ledger export written to {ledger.export()}")
+
+        trace_path = profiler.write(OUTPUT_DIR)
+        if trace_path:
+            print(f"\n📊 Profile written to {trace_path}")
+            print(profiler.summary_table())
+
+    if failed:
+        print(f"\n❌ {len(failed)} folder(s) failed: {failed} (see `ledger show`)")
 
-        # 3. Record Video
-        print(f"Recording {folder} for {duration}s to {raw_video}...")
-        try:
-            asyncio.run(record_url(index_html, duration, raw_video, 
-                                   overlay_text=overlay_text, 
-                                   overlay_header=overlay_header, 
-                                   cta_text=cta_text, 
-                                   cta_subtext=cta_subtext))
-        except Exception as e:
-            print(f"❌ RECORDING FAILED for {folder}: {e}")
-            import traceback
-            traceback.print_exc()
-
-        # 4. Finalize
-        if os.path.exists(raw_video):
-            # Check file size
-            size = os.path.getsize(raw_video)
-            print(f"   Raw Video Created: {size} bytes")
-            if size < 1000:
-                 print("⚠️ Warning: Video file is suspiciously small.")
-            
-            if has_audio and os.path.exists(voiceover):
-                assemble_video(raw_video, voiceover, final_video)
-            else:
-                # Silent Finalization
-                shutil.copy(raw_video, final_video)
-                print(f"Silent video ready: {final_video}")
-            
-            # Update History (Temporarily disabled for debug)
-            # previous_history.append(folder)
-            # with open(history_file, 'w') as f:
-            #     json.dump(previous_history, f)
-        else:
-            print(f"❌ Critical: Raw video file not found at {raw_video}")
-            
     print("\n✅ Batch Run Complete. Directory Listing of Output:")
     print(os.listdir(OUTPUT_DIR))
 
+def run_label(run_id):
+    """Short column label for a run id (its HHMMSS part for run_<date>_<time>_...)."""
+    parts = run_id.split("_")
+    return parts[2] if len(parts) > 2 and parts[0] == "run" else run_id[-6:]
+
+def cmd_ledger(args):
+    ledger = open_ledger()
+    if args.action == "export":
+        print(f"Ledger export written to {ledger.export(args.output)}")
+    elif args.action == "show":
+        for folder in args.folders or get_content_folders():
+            status = "published" if ledger.is_published(folder) else "pending"
+            print(f"{folder}: {status}")
+            for r in ledger.folder_history(folder):
+                took = f"{r['finished_at'] - r['started_at']:.1f}s" if r["finished_at"] else "-"
+                print(f"   {r['run_id']:<24} {r['outcome'] or '?':<10} {took:>8}  {r['reason'] or ''}")
+    else:
+        run_ids, trends = ledger.stage_trends(args.stage, args.runs)
+        if not run_ids:
+            print("No runs recorded yet.")
+            return
+        print("Average wall seconds per stage, oldest run first:")
+        print(f"{'stage':<18} " + " ".join(f"{run_label(r):>8}" for r in run_ids))
+        for stage, values in sorted(trends.items()):
+            cells = " ".join(f"{v:>8.2f}" if v is not None else f"{'-':>8}" for v in values)
+            flag = "  ⚠️ slower than median" if is_regression(values) else ""
+            print(f"{stage:<18} {cells}{flag}")
+
+def cmd_audio_only(args):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for folder in select_folders(args.folders, args.all, args.batch_size):
+        print(f"\n🎙  Audio: {folder}")
+        paths = folder_paths(folder)
+        duration, has_audio = run_audio(paths, load_script(paths))
+        print(f"   {'Voiceover ' + paths['voiceover'] if has_audio else 'Silent'} ({duration}s)")
+
+def cmd_assemble(args):
+    for folder in args.folders:
+        print(f"\n🎬 Assemble: {folder}")
+        paths = folder_paths(folder)
+        artifacts = ArtifactManager(OUTPUT_DIR, keep_intermediates=args.keep_intermediates)
+        if run_finalize(paths, os.path.exists(paths["voiceover"]), artifacts):
+            artifacts.release(paths["raw_video"], paths["voiceover"])
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Autonomous YouTube Shorts Factory")
+    sub = parser.add_subparsers(dest="command")
+
+    def selection(p, positional=True):
+        if positional:
+            p.add_argument("folders", nargs="*", help="Content folders (default: next pending batch)")
+        p.add_argument("--all", action="store_true", help="Ignore history and take every folder")
+        p.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    p = sub.add_parser("plan", help="List pending work (fast, no backends loaded)")
+    selection(p, positional=False)
+    p.set_defaults(func=cmd_plan)
+
+    p = sub.add_parser("render", help="Run the full pipeline")
+    selection(p)
+    p.add_argument("--resume", action="store_true",
+                   help="Continue the last run from each folder's last committed stage")
+    p.add_argument("--keep-intermediates", action="store_true",
+                   help="Keep raw_*.mp4 / voice_*.mp3 after the final video is committed (debugging)")
+    p.add_argument("--disk-budget-mb", type=float, default=OUTPUT_BUDGET_MB,
+                   help="Pause the batch before output/ would exceed this size (env: OUTPUT_BUDGET_MB)")
+    p.add_argument("--disk-wait", type=float, default=0,
+                   help="Seconds to wait for space before pausing the batch")
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("ledger", help="Query or export the run ledger")
+    p.add_argument("action", nargs="?", choices=["trends", "show", "export"], default="trends")
+    p.add_argument("folders", nargs="*", help="Folders for 'show' (default: all)")
+    p.add_argument("--stage", help="Only this stage (trends)")
+    p.add_argument("--runs", type=int, default=10, help="Number of recent runs (trends)")
+    p.add_argument("--output", help="Export path (default: data/ledger.json)")
+    p.set_defaults(func=cmd_ledger)
+
+    p = sub.add_parser("audio-only", help="Generate voiceovers only")
+    selection(p)
+    p.set_defaults(func=cmd_audio_only)
+
+    p = sub.add_parser("assemble", help="Mux existing raw video and voiceover into the final video")
+    p.add_argument("folders", nargs="+")
+    p.add_argument("--keep-intermediates", action="store_true",
+                   help="Keep raw_*.mp4 / voice_*.mp3 after assembling")
+    p.set_defaults(func=cmd_assemble)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.command:
+        # Legacy invocation (`python src/main.py`): render every folder
+        args = parser.parse_args(["render", "--all"])
+    if args.command in ("render", "audio-only", "assemble"):
+        from dotenv import load_dotenv
+        load_dotenv()
+    args.func(args)
+
 if __name__ == "__main__":
     main()
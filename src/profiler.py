@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+# Profiling is cheap (a few syscalls per stage), so it stays on by default.
+# Set PROFILING=0 to disable it entirely.
+PROFILING_ENABLED = os.getenv("PROFILING", "1") != "0"
+
+
+# How often descendant processes (Chromium, ffmpeg) are sampled for RSS
+CHILD_SAMPLE_INTERVAL_S = 0.25
+
+HAS_PROC = os.path.exists("/proc/self/status")
+
+
+def _status_kb(pid, field):
+    """Reads a 'kB' field (VmRSS, VmHWM) from /proc/<pid>/status; 0 if unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def _reset_peak_rss():
+    """
+    Resets this process's VmHWM so the next read is the peak since now (Linux).
+    Returns False where that isn't possible; peaks are then process-lifetime.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _self_peak_rss_mb():
+    """Peak RSS of this process in MB since the last reset (lifetime peak without /proc)."""
+    if HAS_PROC:
+        return _status_kb("self", "VmHWM") / 1024
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _descendants_rss_mb():
+    """Current total RSS of all live descendant processes in MB (Linux only)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # ppid is the 2nd field after the ')' that closes the command name
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    total_kb = 0
+    todo = list(children.get(os.getpid(), []))
+    while todo:
+        pid = todo.pop()
+        total_kb += _status_kb(pid, "VmRSS")
+        todo.extend(children.get(pid, []))
+    return total_kb / 1024
+
+
+def _child_cpu():
+    t = os.times()
+    return t.children_user + t.children_system
+
+
+class Profiler:
+    """
+    Records wall time, CPU time and peak RSS for each pipeline stage.
+    Stages nest, and each content folder gets its own track in the trace,
+    so the output can be opened directly in chrome://tracing or Perfetto.
+    """
+    def __init__(self, enabled=PROFILING_ENABLED):
+        self.enabled = enabled
+        self.records = []      # finished stages (dicts)
+        self.metrics = {}      # folder -> browser-side metrics
+        self.events = []       # chrome trace events
+        self.folder = None
+        self._tracks = {}
+        self._lock = threading.Lock()
+        self._stack = []       # open stages: {"peak": MB, "child_peak": MB}
+        self._sampler = None
+        self._t0 = time.perf_counter()
+        self.started_at = time.time()
+
+    def _ts(self):
+        return (time.perf_counter() - self._t0) * 1e6  # microseconds
+
+    def _tid(self, folder):
+        key = folder or "(batch)"
+        if key not in self._tracks:
+            tid = len(self._tracks)
+            self._tracks[key] = tid
+            self.events.append({
+                "name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                "args": {"name": key}
+            })
+        return self._tracks[key]
+
+    @contextmanager
+    def folder_scope(self, folder):
+        """Attributes every stage opened inside the block to 'folder'."""
+        previous = self.folder
+        self.folder = folder
+        try:
+            with self.stage("folder", cat="folder"):
+                yield
+        finally:
+            self.folder = previous
+
+    def _fold_self_peak(self):
+        """Credits the current VmHWM to every open stage (before it gets reset)."""
+        peak = _self_peak_rss_mb()
+        for frame in self._stack:
+            frame["peak"] = max(frame["peak"], peak)
+
+    def _sample_children(self):
+        while True:
+            time.sleep(CHILD_SAMPLE_INTERVAL_S)
+            if not self._stack:
+                continue
+            rss = _descendants_rss_mb()
+            with self._lock:
+                for frame in self._stack:
+                    frame["child_peak"] = max(frame["child_peak"], rss)
+
+    def _start_sampler(self):
+        if self._sampler is None and HAS_PROC:
+            self._sampler = threading.Thread(target=self._sample_children, daemon=True)
+            self._sampler.start()
+
+    @contextmanager
+    def stage(self, name, cat="stage", **args):
+        if not self.enabled:
+            yield
+            return
+
+        # Per-stage peak RSS: fold the running peak into the enclosing stages,
+        # then reset VmHWM so this stage measures its own high-water mark.
+        self._start_sampler()
+        frame = {"peak": 0.0, "child_peak": 0.0}
+        with self._lock:
+            self._fold_self_peak()
+            self._stack.append(frame)
+        _reset_peak_rss()
+        wall0 = time.perf_counter()
+        cpu0 = time.process_time()
+        child0 = _child_cpu()
+        ts = self._ts()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            wall = time.perf_counter() - wall0
+            with self._lock:
+                self._fold_self_peak()
+                self._stack = [f for f in self._stack if f is not frame]
+                for parent in self._stack:
+                    parent["child_peak"] = max(parent["child_peak"], frame["child_peak"])
+            record = {
+                "folder": self.folder,
+                "stage": name,
+                "wall_s": round(wall, 4),
+                "cpu_s": round(time.process_time() - cpu0, 4),
+                "child_cpu_s": round(_child_cpu() - child0, 4),
+                "peak_rss_mb": round(frame["peak"], 1),
+                "child_peak_rss_mb": round(frame["child_peak"], 1),
+            }
+            if error:
+                record["error"] = error
+            event_args = dict(args)
+            event_args.update({k: v for k, v in record.items() if k not in ("folder", "stage")})
+            with self._lock:
+                self.records.append(record)
+                self.events.append({
+                    "name": name, "cat": cat, "ph": "X",
+                    "ts": ts, "dur": wall * 1e6,
+                    "pid": os.getpid(), "tid": self._tid(self.folder),
+                    "args": event_args
+                })
+
+    def record_metrics(self, metrics, folder=None):
+        """Attaches browser-side metrics (from the recorder) to a folder."""
+        if not self.enabled or not metrics:
+            return
+        folder = folder or self.folder
+        with self._lock:
+            self.metrics.setdefault(folder, {}).update(metrics)
+            numeric = {k: v for k, v in metrics.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+            if numeric:
+                self.events.append({
+                    "name": "browser_metrics", "ph": "C", "ts": self._ts(),
+                    "pid": os.getpid(), "tid": self._tid(folder), "args": numeric
+                })
+
+    def summary_table(self):
+        header = (f"{'folder':<20} {'stage':<22} {'wall_s':>9} {'cpu_s':>8} {'child_cpu_s':>11} "
+                  f"{'peak_rss_mb':>11} {'child_rss_mb':>12}")
+        lines = [header, "-" * len(header)]
+        for r in self.records:
+            if r["stage"] == "folder":
+                continue
+            lines.append(
+                f"{(r['folder'] or '-'):<20} {r['stage']:<22} {r['wall_s']:>9.2f} {r['cpu_s']:>8.2f} "
+                f"{r['child_cpu_s']:>11.2f} {r['peak_rss_mb']:>11.1f} {r['child_peak_rss_mb']:>12.1f}"
+                + (f"  ({r['error']})" if "error" in r else "")
+            )
+        for r in self.records:
+            if r["stage"] == "folder":
+                lines.append(f"{'TOTAL ' + (r['folder'] or '-'):<43} {r['wall_s']:>9.2f}")
+        for folder, metrics in self.metrics.items():
+            lines.append("")
+            lines.append(f"Browser metrics: {folder}")
+            for k, v in metrics.items():
+                lines.append(f"   {k:<28} {v}")
+        return "\n".join(lines)
+
+    def write(self, output_dir):
+        """
+        Writes the Chrome trace (trace_<timestamp>.json) and a plain-text
+        summary (profile_summary.txt) into output_dir. Returns the trace path.
+        """
+        if not self.enabled:
+            return None
+        os.makedirs(output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.started_at))
+        trace_path = os.path.join(output_dir, f"trace_{stamp}.json")
+        with open(trace_path, "w") as f:
+            json.dump({
+                "traceEvents": self.events,
+                "displayTimeUnit": "ms",
+                "metadata": {"started_at": self.started_at, "browser_metrics": self.metrics}
+            }, f)
+        with open(os.path.join(output_dir, "profile_summary.txt"), "w") as f:
+            f.write(self.summary_table() + "\n")
+        return trace_path
+
+
+_current = Profiler(enabled=False)
+
+
+def get_profiler():
+    """Returns the active profiler (a disabled no-op one if none was started)."""
+    return _current
+
+
+def start_profiler(enabled=PROFILING_ENABLED):
+    global _current
+    _current = Profiler(enabled=enabled)
+    return _current
@@ -1,12 +1,13 @@
 import asyncio
-from playwright.async_api import async_playwright
 import os
 import threading
 import http.server
 import socketserver
+import functools
 import time
 import random
 import math
+from profiler import get_profiler
 
 # --- Helper to start a local server for the content ---
 SERVER_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../")) 
@@ -20,11 +21,14 @@ class QuietHandler(http.server.SimpleHTTPRequestHandler):
 class ReusableTCPServer(socketserver.TCPServer):
     allow_reuse_address = True
 
+_server_thread = None
+_server_lock = threading.Lock()
+
 def start_server():
     global SERVER_PORT
     try:
-        os.chdir(SERVER_ROOT)
-        with ReusableTCPServer(("", 0), QuietHandler) as httpd:
+        handler = functools.partial(QuietHandler, directory=SERVER_ROOT)
+        with ReusableTCPServer(("", 0), handler) as httpd:
             SERVER_PORT = httpd.server_address[1]
             print(f"Serving at port {SERVER_PORT}")
             SERVER_READY.set()
@@ -39,6 +43,141 @@ def run_server_in_thread():
     t.start()
     return t
 
+def ensure_server(timeout=5):
+    """Starts the content server on first use and waits until it is listening."""
+    global _server_thread
+    with _server_lock:
+        if _server_thread is None:
+            _server_thread = run_server_in_thread()
+    if not SERVER_READY.wait(timeout=timeout) or not SERVER_PORT:
+        raise RuntimeError("Content server failed to start")
+
+# --- SMOOTH-SCROLL LIBRARY HANDLING ---
+# Pages using Lenis / Locomotive / GSAP ScrollSmoother interpolate scroll
+# themselves. Forcing window.scrollTo on top of that makes both animate every
+# frame. Instead we capture their instances and drive them with their own
+# "immediate" APIs, so our easing is the only interpolation.
+
+# Runs in every frame before page scripts: wraps library constructors so the
+# instances they create are reachable even when kept in a closure.
+SCROLL_HOOKS_JS = """(() => {
+    const cap = window.__capScroll = { lenis: [], locomotive: [] };
+    const hook = (name, bucket) => {
+        let Lib;
+        Object.defineProperty(window, name, {
+            configurable: true,
+            get() { return Lib; },
+            set(C) {
+                Lib = typeof C !== 'function' ? C : class extends C {
+                    constructor(...args) { super(...args); cap[bucket].push(this); }
+                };
+            }
+        });
+    };
+    hook('Lenis', 'lenis');
+    hook('LocomotiveScroll', 'locomotive');
+})();"""
+
+DETECT_SCROLL_JS = """() => {
+    const cap = window.__capScroll || { lenis: [], locomotive: [] };
+    const html = document.documentElement;
+    const st = window.ScrollTrigger;
+    const triggers = st && st.getAll ? st.getAll() : [];
+    const smoother = window.ScrollSmoother && window.ScrollSmoother.get ? window.ScrollSmoother.get() : null;
+    return {
+        lenis: cap.lenis.length > 0 || html.classList.contains('lenis'),
+        lenisInstances: cap.lenis.length,
+        locomotive: cap.locomotive.length > 0 || html.classList.contains('has-scroll-smooth'),
+        locomotiveInstances: cap.locomotive.length,
+        scrollSmoother: !!smoother,
+        scrollTriggers: triggers.length,
+        scrubTriggers: triggers.filter(t => t.vars && t.vars.scrub).length,
+        pinnedTriggers: triggers.filter(t => t.vars && t.vars.pin).length,
+        cssSmooth: getComputedStyle(html).scrollBehavior === 'smooth' || getComputedStyle(document.body).scrollBehavior === 'smooth'
+    };
+}"""
+
+# Installs window.__captureScrollTo(y): moves the page to y in one step through
+# whichever scroll pipeline owns it, and returns that pipeline's own position
+# (transform-based libraries leave window.scrollY at 0). If the library call
+# throws (instance destroyed), it falls back to native scrolling.
+SCROLL_DRIVER_JS = """() => {
+    const cap = window.__capScroll || { lenis: [], locomotive: [] };
+    const smoother = window.ScrollSmoother && window.ScrollSmoother.get ? window.ScrollSmoother.get() : null;
+    const num = v => typeof v === 'number' ? v : window.scrollY;
+    let driver = 'native';
+    let scrollTo = y => window.scrollTo(0, y);
+    let position = () => window.scrollY;
+    if (smoother) {
+        driver = 'scrollsmoother';
+        if (smoother.smooth) smoother.smooth(0);
+        scrollTo = y => smoother.scrollTop(y);
+        position = () => num(smoother.scrollTop());
+    } else if (cap.lenis.length) {
+        driver = 'lenis';
+        scrollTo = y => cap.lenis.forEach(l => l.scrollTo(y, { immediate: true, force: true }));
+        position = () => num(cap.lenis[0].scroll);
+    } else if (cap.locomotive.length) {
+        driver = 'locomotive';
+        scrollTo = y => cap.locomotive.forEach(l => l.scrollTo(y, { duration: 0, disableLerp: true, immediate: true }));
+        position = () => {
+            const l = cap.locomotive[0];
+            const inner = l.scroll && l.scroll.instance && l.scroll.instance.scroll;  // v3
+            return num(inner ? inner.y : l.lenisInstance && l.lenisInstance.scroll);  // v4 wraps Lenis
+        };
+    }
+    window.__captureScrollTo = y => {
+        try { scrollTo(y); return position(); }
+        catch (e) { window.scrollTo(0, y); return window.scrollY; }
+    };
+    return driver;
+}"""
+
+# Used for every scroll step: falls back to native scrolling if the driver is
+# gone (e.g. the iframe navigated and lost its injected globals).
+SCROLL_TO_JS = "y => window.__captureScrollTo ? window.__captureScrollTo(y) : (window.scrollTo(0, y), window.scrollY)"
+
+# Native smooth scrolling would animate every scrollTo call on its own.
+DISABLE_CSS_SMOOTH = "html, body { scroll-behavior: auto !important; }"
+
+async def install_scroll_driver(content_frame):
+    """
+    Detects smooth-scroll / scroll-trigger libraries and installs the scroll driver.
+    Returns (driver_name, detection_dict). Never raises: without a driver,
+    SCROLL_TO_JS scrolls natively.
+    """
+    try:
+        libs = await content_frame.evaluate(DETECT_SCROLL_JS)
+        await content_frame.add_style_tag(content=DISABLE_CSS_SMOOTH)
+        driver = await content_frame.evaluate(SCROLL_DRIVER_JS)
+    except Exception as e:
+        print(f"   (!) Scroll driver not installed, using native scroll: {e}")
+        return "native", {}
+    found = [k for k in ("lenis", "locomotive", "scrollSmoother", "cssSmooth") if libs.get(k)]
+    if libs.get("scrollTriggers"):
+        found.append(f"ScrollTrigger x{libs['scrollTriggers']} ({libs['scrubTriggers']} scrub, {libs['pinnedTriggers']} pinned)")
+    print(f">> Scroll pipeline: {', '.join(found) or 'native'} -> driving via {driver}")
+    if driver == "native" and (libs.get("lenis") or libs.get("locomotive")):
+        print("   (!) Smooth-scroll library detected but its instance is not reachable; falling back to native scroll.")
+    return driver, libs
+
+def assess_scroll_pipeline(metrics, target_fps, libs):
+    """
+    Flags pages whose scroll pipeline cannot keep up with the capture frame rate:
+    the page painted well below target fps, or our scroll ticks overran their budget.
+    """
+    page_fps = metrics.get("page_fps")
+    ticks = metrics.get("scroll_ticks") or 0
+    slow_share = metrics.get("scroll_ticks_over_budget", 0) / ticks if ticks else 0
+    too_costly = (page_fps is not None and page_fps < target_fps * 0.9) or slow_share > 0.1
+    metrics["scroll_pipeline_ok"] = not too_costly
+    if too_costly:
+        print(f"⚠️ Scroll pipeline too costly for {target_fps} fps capture: "
+              f"page ran at {page_fps} fps, {slow_share:.0%} of scroll ticks over budget "
+              f"(ScrollTriggers: {libs.get('scrollTriggers', 0)}, scrub: {libs.get('scrubTriggers', 0)}, "
+              f"long tasks: {metrics.get('long_tasks', 0)}).")
+    return not too_costly
+
 # --- REFINED HUMAN SCROLLING ENGINE ---
 
 def ease_in_out_cubic(t):
@@ -73,6 +212,11 @@ class HumanScroller:
         # Organic variation seeds
         self.time_offset = random.random() * 1000
 
+        # Tick cost accounting (reported as browser metrics)
+        self.ticks = 0
+        self.tick_time = 0.0
+        self.slow_ticks = 0
+
     def frame_to_viewport(self, fx, fy):
         vx = self.wrapper_offset['x'] + (fx * self.scale_factor)
         vy = self.wrapper_offset['y'] + (fy * self.scale_factor)
@@ -118,17 +262,35 @@ class HumanScroller:
             # Current scroll position
             self.scroll_y = start_y + distance * eased_t
             
-            # Apply scroll
-            await self.frame.evaluate(f"window.scrollTo(0, {self.scroll_y})")
+            # Apply scroll (only this round trip counts as scroll tick cost)
+            tick_start = time.perf_counter()
+            await self.frame.evaluate(SCROLL_TO_JS, self.scroll_y)
+            self.record_tick(time.perf_counter() - tick_start)
             
             # Organic mouse movement
             await self.organic_mouse_update(elapsed)
             
             await asyncio.sleep(self.DT)
         
-        # Final snap
+        # Final snap (retry once if the page's scroll pipeline hasn't settled)
         self.scroll_y = target_y
-        await self.frame.evaluate(f"window.scrollTo(0, {target_y})")
+        reached = await self.frame.evaluate(SCROLL_TO_JS, target_y)
+        if abs(reached - target_y) > 2:
+            await asyncio.sleep(self.DT)
+            await self.frame.evaluate(SCROLL_TO_JS, target_y)
+
+    def record_tick(self, cost):
+        self.ticks += 1
+        self.tick_time += cost
+        if cost > self.DT:
+            self.slow_ticks += 1
+
+    def tick_stats(self):
+        return {
+            "scroll_ticks": self.ticks,
+            "scroll_tick_avg_ms": round(1000 * self.tick_time / self.ticks, 2) if self.ticks else 0.0,
+            "scroll_ticks_over_budget": self.slow_ticks,
+        }
 
     async def glide_with_pauses(self, max_scroll, total_duration, pause_points=[]):
         """
@@ -266,23 +428,89 @@ async def choreography_script(page, frame, scroller):
     await scroller.reading_behavior(4.0)
 
 
+# Injected into the content frame: counts painted frames and long tasks so we
+# can tell whether the page kept up with the capture frame rate.
+FRAME_COUNTER_JS = """() => {
+    if (window.__capStats) return;
+    const s = window.__capStats = { frames: 0, start: performance.now(), longTasks: 0, longTaskMs: 0 };
+    const tick = () => { s.frames++; requestAnimationFrame(tick); };
+    requestAnimationFrame(tick);
+    try {
+        new PerformanceObserver(list => {
+            list.getEntries().forEach(e => { s.longTasks++; s.longTaskMs += e.duration; });
+        }).observe({ entryTypes: ['longtask'] });
+    } catch (e) {}
+}"""
+
+FRAME_STATS_JS = """() => {
+    const s = window.__capStats;
+    if (!s) return null;
+    const elapsed = (performance.now() - s.start) / 1000;
+    return { frames: s.frames, elapsed: elapsed, longTasks: s.longTasks, longTaskMs: s.longTaskMs,
+             heapMB: performance.memory ? performance.memory.usedJSHeapSize / 1048576 : 0,
+             pageHeight: document.documentElement.scrollHeight };
+}"""
+
+CDP_METRICS = ("LayoutCount", "RecalcStyleCount", "LayoutDuration", "RecalcStyleDuration",
+               "ScriptDuration", "TaskDuration", "JSHeapUsedSize", "Nodes")
+
+
+async def collect_browser_metrics(content_frame, cdp, scroller):
+    """Gathers browser-side capture metrics. Never raises: metrics are best effort."""
+    metrics = dict(scroller.tick_stats())
+    try:
+        stats = await content_frame.evaluate(FRAME_STATS_JS)
+        if stats and stats["elapsed"] > 0:
+            metrics["page_fps"] = round(stats["frames"] / stats["elapsed"], 2)
+            metrics["page_frames"] = stats["frames"]
+            metrics["long_tasks"] = stats["longTasks"]
+            metrics["long_task_ms"] = round(stats["longTaskMs"], 1)
+            metrics["js_heap_mb"] = round(stats["heapMB"], 1)
+            metrics["page_height"] = stats["pageHeight"]
+    except Exception as e:
+        print(f"   (metrics) frame stats unavailable: {e}")
+    if cdp:
+        try:
+            result = await cdp.send("Performance.getMetrics")
+            for m in result.get("metrics", []):
+                if m["name"] in CDP_METRICS:
+                    metrics[f"cdp_{m['name']}"] = round(m["value"], 3)
+        except Exception as e:
+            print(f"   (metrics) CDP metrics unavailable: {e}")
+    return metrics
+
+
 async def record_url(file_path: str, duration: float, output_path: str, overlay_text: str = "", overlay_header: str = "", cta_text: str = "", cta_subtext: str = ""):
+    from playwright.async_api import async_playwright
+    ensure_server()
     rel_path = os.path.relpath(file_path, SERVER_ROOT)
     target_url = f"http://localhost:{SERVER_PORT}/{rel_path.replace(os.sep, '/')}"
     print(f"Recording URL: {target_url}")
+    profiler = get_profiler()
+    metrics = {}
 
     async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=['--enable-features=OverlayScrollbar', '--no-sandbox', '--disable-web-security']
-        )
-        context = await browser.new_context(
-            viewport={"width": 1080, "height": 1920},
-            device_scale_factor=1.0,
-            record_video_dir=os.path.dirname(output_path),
-            record_video_size={"width": 1080, "height": 1920}
-        )
-        page = await context.new_page()
+        with profiler.stage("chromium_launch"):
+            browser = await p.chromium.launch(
+                headless=True,
+                args=['--enable-features=OverlayScrollbar', '--no-sandbox', '--disable-web-security']
+            )
+            context = await browser.new_context(
+                viewport={"width": 1080, "height": 1920},
+                device_scale_factor=1.0,
+                record_video_dir=os.path.dirname(output_path),
+                record_video_size={"width": 1080, "height": 1920}
+            )
+            await context.add_init_script(SCROLL_HOOKS_JS)
+            page = await context.new_page()
+        
+        cdp = None
+        if profiler.enabled:
+            try:
+                cdp = await context.new_cdp_session(page)
+                await cdp.send("Performance.enable")
+            except Exception as e:
+                print(f"   (metrics) CDP session unavailable: {e}")
         
         VIRTUAL_W, CONTAINER_H, CONTAINER_W = 1024, 1550, 1000
         SCALE_FACTOR = CONTAINER_W / VIRTUAL_W
@@ -317,41 +545,54 @@ async def record_url(file_path: str, duration: float, output_path: str, overlay_
             <script>const c=document.getElementById('ai-cursor');let v=false;document.addEventListener('mousemove',e=>{{if(!v){{c.style.opacity='1';v=true}}c.style.left=e.clientX+'px';c.style.top=e.clientY+'px'}})</script>
         </body></html>
         """
-        await page.set_content(host_html)
-        
-        iframe_element = await page.query_selector('#content-iframe')
-        content_frame = await iframe_element.content_frame()
-        if not content_frame: await page.wait_for_timeout(2000); content_frame = await iframe_element.content_frame()
-        if not content_frame: return
-        try: await content_frame.wait_for_load_state("networkidle")
-        except: await page.wait_for_timeout(2000)
+        with profiler.stage("page_load"):
+            await page.set_content(host_html)
+            
+            iframe_element = await page.query_selector('#content-iframe')
+            content_frame = await iframe_element.content_frame()
+            if not content_frame: await page.wait_for_timeout(2000); content_frame = await iframe_element.content_frame()
+        if not content_frame: return metrics
+        with profiler.stage("networkidle"):
+            # Pages with polling/analytics may never go idle; don't wait forever
+            try: await content_frame.wait_for_load_state("networkidle", timeout=15000)
+            except: await page.wait_for_timeout(2000)
         
+        try: await content_frame.evaluate(FRAME_COUNTER_JS)
+        except Exception as e: print(f"   (metrics) frame counter not installed: {e}")
+        driver, scroll_libs = await install_scroll_driver(content_frame)
         await content_frame.add_style_tag(content="::-webkit-scrollbar { display: none; } body { -ms-overflow-style: none; scrollbar-width: none; }")
         wrapper_offset = await page.evaluate("() => { const r = document.getElementById('presentation-window').getBoundingClientRect(); return {x:r.left, y:r.top}; }")
         
         scroller = HumanScroller(page, content_frame, wrapper_offset, SCALE_FACTOR)
         await page.mouse.move(540, 960)
         
-        try:
-            await asyncio.wait_for(choreography_script(page, content_frame, scroller), timeout=60.0)
-        except asyncio.TimeoutError:
-            print("(!) Video Limit Reached.")
+        with profiler.stage("choreography"):
+            try:
+                await asyncio.wait_for(choreography_script(page, content_frame, scroller), timeout=60.0)
+            except asyncio.TimeoutError:
+                print("(!) Video Limit Reached.")
+        
+        metrics = await collect_browser_metrics(content_frame, cdp, scroller)
+        metrics["scroll_driver"] = driver
+        assess_scroll_pipeline(metrics, scroller.FPS, scroll_libs)
+        profiler.record_metrics(metrics)
             
-        video = page.video
-        await context.close()
-        if video:
-            saved = await video.path()
-            await browser.close()
-            if os.path.exists(output_path): os.remove(output_path)
-            import shutil
-            shutil.move(saved, output_path)
-            print(f"Video saved to {output_path}")
+        with profiler.stage("video_finalize"):
+            video = page.video
+            await context.close()
+            if video:
+                saved = await video.path()
+                await browser.close()
+                if os.path.exists(output_path): os.remove(output_path)
+                import shutil
+                shutil.move(saved, output_path)
+                print(f"Video saved to {output_path}")
+        return metrics
 
 if __name__ == "__main__":
-    t = run_server_in_thread()
-    if SERVER_READY.wait(timeout=5):
-        time.sleep(1)
+    try:
+        ensure_server()
         test_html = os.path.abspath(os.path.join(os.path.dirname(__file__), "../content_pool/business_01/index.html"))
         asyncio.run(record_url(test_html, 55, "test_output.mp4"))
-    else:
+    except RuntimeError:
         print("Server Failed to start!")
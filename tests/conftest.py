@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules live flat in src/, the same way src/main.py imports them
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
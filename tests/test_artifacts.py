@@ -0,0 +1,83 @@
+import os
+
+from artifacts import ArtifactManager, footprint, MB
+
+
+def write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return str(path)
+
+
+def test_budget_pauses_batch_and_reclaims_leftovers(tmp_path):
+    write(tmp_path / "final_a.mp4", MB)
+    write(tmp_path / ".final_b.123.tmp.mp4", MB)
+    write(tmp_path / "orphan.webm", MB)
+    manager = ArtifactManager(str(tmp_path), budget_mb=2, min_free_mb=0)
+    manager.observe_folder(MB // 2)
+    manager.observe_folder(2 * MB)  # the estimate is the largest folder seen
+
+    # 1 MB kept + 2 MB for the next folder > 2 MB, even after reclaiming the leftovers
+    assert manager.wait_for_room() is False
+    assert os.listdir(tmp_path) == ["final_a.mp4"]
+
+    manager.budget = 4 * MB
+    assert manager.wait_for_room() is True
+
+
+def test_first_measurement_replaces_default_estimate(tmp_path):
+    manager = ArtifactManager(str(tmp_path), budget_mb=1, min_free_mb=0)
+    assert manager.has_room() is False  # default estimate is 200 MB
+    manager.observe_folder(MB // 4)
+    assert manager.has_room() is True
+
+
+def test_footprint_counts_hard_links_once(tmp_path):
+    raw = write(tmp_path / "raw_a.mp4", 1000)
+    final = str(tmp_path / "final_a.mp4")
+    os.link(raw, final)
+    meta = write(tmp_path / "metadata_a.json", 10)
+    assert footprint([raw, final, meta, str(tmp_path / "missing.mp3")]) == 1010
+    assert ArtifactManager(str(tmp_path)).usage() == 1010
+
+
+def test_promote_and_release(tmp_path):
+    raw, final = str(tmp_path / "raw_a.mp4"), str(tmp_path / "final_a.mp4")
+    write(raw, 100)
+
+    keep = ArtifactManager(str(tmp_path), keep_intermediates=True)
+    keep.promote(raw, final)
+    assert os.path.samefile(raw, final)
+    assert keep.release(raw) == 0 and os.path.exists(raw)
+
+    os.remove(final)
+    drop = ArtifactManager(str(tmp_path))
+    drop.promote(raw, final)
+    assert not os.path.exists(raw) and os.path.getsize(final) == 100
+    voice = write(tmp_path / "voice_a.mp3", 50)
+    assert drop.release(raw, voice) == 50
+    assert os.listdir(tmp_path) == ["final_a.mp4"]
+
+
+def test_released_intermediates_keep_their_hashes(tmp_path, monkeypatch):
+    import main
+    from journal import Journal
+    from ledger import Ledger, file_sha256
+
+    monkeypatch.setattr(main, "OUTPUT_DIR", str(tmp_path))
+    paths = main.folder_paths("a")
+    raw = write(paths["raw_video"], 2000)
+    raw_sha = file_sha256(raw)
+    journal = Journal.create(str(tmp_path / "journal"), ["a"])
+    main.journaled(journal, "a", "record", lambda: ({}, [raw]))
+
+    manager = ArtifactManager(str(tmp_path))
+    main.journaled(journal, "a", "finalize", lambda: (manager.promote(raw, paths["final_video"]), [paths["final_video"]]))
+    manager.release(raw)
+
+    ledger = Ledger(str(tmp_path / "ledger.sqlite3"))
+    row = ledger.begin_folder("run_1", "a")
+    main.record_outcome(ledger, row, "a", {"final_video": paths["final_video"], "has_audio": False}, journal, [])
+    artifacts = {r["kind"]: (r["size"], r["sha256"]) for r in ledger.conn.execute("SELECT * FROM artifacts")}
+    ledger.close()
+    assert artifacts == {"raw": (2000, raw_sha), "final": (2000, raw_sha)}
@@ -0,0 +1,96 @@
+import os
+import json
+
+from journal import Journal, atomic_output, cleanup_temp_files
+from main import folder_paths, process_folder
+
+
+def test_torn_last_line_is_ignored_and_terminated(tmp_path):
+    journal = Journal.create(str(tmp_path), ["a"])
+    journal.commit("a", "audio", {"duration": 12, "has_audio": False})
+    with open(journal.path, "a") as f:
+        f.write('{"event": "commit", "folder": "a", "stage": "creat')  # killed mid-write
+
+    replayed = Journal(journal.path)
+    assert replayed.batch == ["a"]
+    assert replayed.committed("a", "audio")["data"]["duration"] == 12
+    assert replayed.committed("a", "creative") is None
+
+    # The next append must not be glued onto the torn line
+    replayed.commit("a", "creative", {"overlay_text": "hi"})
+    again = Journal(journal.path)
+    assert again.committed("a", "creative")["data"] == {"overlay_text": "hi"}
+
+
+def test_fail_uncommits_stage_and_keeps_reason(tmp_path):
+    journal = Journal.create(str(tmp_path), ["a"])
+    journal.commit("a", "record", {})
+    journal.fail("a", "record", "RuntimeError('browser crashed')")
+
+    replayed = Journal(journal.path)
+    assert replayed.committed("a", "record") is None
+    assert replayed.failures["a"] == "record: RuntimeError('browser crashed')"
+
+
+def test_committed_requires_artifacts_but_entry_survives_release(tmp_path):
+    raw = tmp_path / "raw_a.mp4"
+    raw.write_bytes(b"x" * 10)
+    journal = Journal.create(str(tmp_path / "journal"), ["a"])
+    journal.commit("a", "record", {}, [str(raw)])
+    raw.unlink()
+
+    replayed = Journal(journal.path)
+    assert replayed.committed("a", "record") is None
+    assert replayed.entry("a", "record") is not None
+
+
+def test_resume_after_intermediates_released(tmp_path):
+    pool, output = tmp_path / "pool", tmp_path / "output"
+    (pool / "a").mkdir(parents=True)
+    output.mkdir()
+    paths = folder_paths("a", str(pool), str(output))
+    for key in ("voiceover", "raw_video", "final_video"):
+        with open(paths[key], "wb") as f:
+            f.write(b"x")
+
+    journal = Journal.create(str(tmp_path / "journal"), ["a"])
+    journal.commit("a", "audio", {"duration": 21.5, "has_audio": True}, [paths["voiceover"]])
+    journal.commit("a", "record", {}, [paths["raw_video"]])
+    journal.commit("a", "finalize", {}, [paths["final_video"]])
+    os.remove(paths["voiceover"])
+    os.remove(paths["raw_video"])
+
+    # No index.html and no backends: only the resume shortcut can produce this result
+    result = process_folder("a", str(pool), str(output), journal=Journal(journal.path))
+    assert result == {"duration": 21.5, "has_audio": True, "final_video": paths["final_video"]}
+
+
+def test_journal_names_are_unique_within_a_second(tmp_path):
+    first = Journal.create(str(tmp_path), ["a"])
+    second = Journal.create(str(tmp_path), ["b"])
+    assert first.path != second.path
+    assert Journal.latest(str(tmp_path)).batch == ["b"]
+
+
+def test_atomic_output_leaves_target_untouched_on_error(tmp_path):
+    target = tmp_path / "final_a.mp4"
+    target.write_text("old")
+    try:
+        with atomic_output(str(target)) as tmp:
+            with open(tmp, "w") as f:
+                f.write("partial")
+            raise RuntimeError("encode failed")
+    except RuntimeError:
+        pass
+    assert target.read_text() == "old"
+    assert cleanup_temp_files(str(tmp_path)) == 0
+
+
+def test_entries_are_one_json_object_per_line(tmp_path):
+    journal = Journal.create(str(tmp_path), ["a"])
+    journal.start("a", "audio")
+    journal.commit("a", "audio", {"duration": 1}, wall_s=0.5)
+    with open(journal.path) as f:
+        events = [json.loads(line)["event"] for line in f]
+    assert events == ["run", "start", "commit"]
+    assert journal.timings == {"a": {"audio": 0.5}}
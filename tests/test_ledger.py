@@ -0,0 +1,174 @@
+import os
+import json
+import time
+
+import pytest
+
+from ledger import Ledger, classify_outcome, file_sha256, is_regression, read_published
+from profiler import start_profiler
+import main
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = Ledger(str(tmp_path / "ledger.sqlite3"), export_path=str(tmp_path / "ledger.json"))
+    yield ledger
+    ledger.close()
+
+
+def test_classify_outcome():
+    assert classify_outcome({"final_video": "final_a.mp4"}) == ("published", None)
+    assert classify_outcome(None) == ("skipped", "no index.html")
+    assert classify_outcome({"final_video": None}) == ("failed", "no final video")
+    assert classify_outcome({"final_video": None}, failure="record: boom") == ("failed", "record: boom")
+    # An exception wins over everything else, including a missing result
+    assert classify_outcome(None, RuntimeError("boom")) == ("failed", "RuntimeError('boom')")
+
+
+def test_finish_folder_publishes_and_hashes(tmp_path, ledger):
+    final = tmp_path / "final_a.mp4"
+    final.write_bytes(b"video")
+    ledger.start_run("run_1")
+    row = ledger.begin_folder("run_1", "a")
+    ledger.finish_folder(row, "published", stages=[{"stage": "record", "wall_s": 2.0}],
+                         artifacts={"final": str(final), "raw": ("raw_a.mp4", 9, "ab" * 32),
+                                    "voice": str(tmp_path / "missing.mp3")})
+
+    assert ledger.is_published("a")
+    artifacts = {r["kind"]: (r["path"], r["size"], r["sha256"])
+                 for r in ledger.conn.execute("SELECT * FROM artifacts")}
+    assert artifacts == {"final": ("final_a.mp4", 5, file_sha256(str(final))),
+                         "raw": ("raw_a.mp4", 9, "ab" * 32)}
+
+
+def test_export_import_round_trip(tmp_path, ledger):
+    for run_id, wall in (("run_1", 10.0), ("run_2", 14.0)):
+        ledger.start_run(run_id)
+        row = ledger.begin_folder(run_id, "a")
+        ledger.finish_folder(row, "published" if run_id == "run_2" else "failed", reason=None,
+                             stages=[{"stage": "record", "wall_s": wall}],
+                             artifacts={"final": ("final_a.mp4", 5, "cd" * 32)})
+    path = ledger.export()
+
+    seeded = Ledger(str(tmp_path / "fresh.sqlite3"), export_path=path)
+    try:
+        assert seeded.published_folders() == {"a"}
+        assert [r["outcome"] for r in seeded.folder_history("a")] == ["failed", "published"]
+        run_ids, trends = seeded.stage_trends("record")
+        assert run_ids == ["run_1", "run_2"] and trends == {"record": [10.0, 14.0]}
+        seeded.export(str(tmp_path / "again.json"))
+    finally:
+        seeded.close()
+    with open(path) as f, open(tmp_path / "again.json") as g:
+        assert json.load(f) == json.load(g)
+
+
+def test_legacy_history_is_imported_once(tmp_path):
+    legacy = tmp_path / "history.json"
+    legacy.write_text(json.dumps(["a", "b"]))
+    ledger = Ledger(str(tmp_path / "ledger.sqlite3"), legacy_history=str(legacy))
+    assert ledger.published_folders() == {"a", "b"}
+    ledger.close()
+
+
+def test_is_regression():
+    assert is_regression([10, 10, 11, 13])
+    assert not is_regression([10, 10, 11, 11.5])
+    assert not is_regression([None, 10])
+
+
+def test_raising_folder_is_failed_and_batch_continues(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "JOURNAL_DIR", str(tmp_path / "journal"))
+    monkeypatch.setattr(main, "LEDGER_DB", str(tmp_path / "ledger.sqlite3"))
+    monkeypatch.setattr(main, "LEDGER_EXPORT", str(tmp_path / "ledger.json"))
+
+    def process_folder(folder, journal=None, artifacts=None):
+        main.journaled(journal, folder, "audio", lambda: ({"duration": 5, "has_audio": False}, []))
+        if folder == "a":
+            raise RuntimeError("browser crashed")
+        return None
+
+    monkeypatch.setattr(main, "process_folder", process_folder)
+    monkeypatch.setattr(main, "start_profiler", lambda: start_profiler(enabled=False))
+    args = main.build_parser().parse_args(["render", "a", "b"])
+    args.func(args)
+
+    with open(tmp_path / "ledger.json") as f:
+        runs = {r["folder"]: r for r in json.load(f)["folder_runs"]}
+    assert (runs["a"]["outcome"], runs["a"]["reason"]) == ("failed", "RuntimeError('browser crashed')")
+    assert (runs["b"]["outcome"], runs["b"]["reason"]) == ("skipped", "no index.html")
+    # Journaled stages are timed even without the profiler
+    assert {"audio", "folder"} <= set(runs["a"]["stages"])
+
+
+def test_plan_reads_published_without_creating_the_store(tmp_path, monkeypatch, capsys):
+    export = tmp_path / "ledger.json"
+    export.write_text(json.dumps({"version": 1, "published": {"a": ["run_1", 1.0]}, "folder_runs": []}))
+    monkeypatch.setattr(main, "LEDGER_DB", str(tmp_path / "ledger.sqlite3"))
+    monkeypatch.setattr(main, "LEDGER_EXPORT", str(export))
+    monkeypatch.setattr(main, "get_content_folders", lambda: ["a", "b", "c"])
+
+    args = main.build_parser().parse_args(["plan", "--batch-size", "1"])
+    args.func(args)
+
+    out = capsys.readouterr().out
+    assert "Published: 1 | Pending: 2" in out
+    assert "next: b" in out and "1 more pending" in out
+    assert os.listdir(tmp_path) == ["ledger.json"]
+
+
+def test_read_published_prefers_the_store(tmp_path, ledger):
+    ledger.start_run("run_1")
+    ledger.finish_folder(ledger.begin_folder("run_1", "a"), "published")
+    ledger.close()
+    (tmp_path / "ledger.json").write_text(json.dumps({"published": {"stale": ["run_0", 0]}}))
+    assert read_published(ledger.db_path, str(tmp_path / "ledger.json")) == {"a"}
+    assert read_published(str(tmp_path / "missing.sqlite3"), str(tmp_path / "ledger.json")) == {"stale"}
+
+
+def test_resume_updates_rows_instead_of_adding_them(tmp_path, monkeypatch):
+    pool, output = tmp_path / "pool", tmp_path / "output"
+    for folder in ("a", "b", "c"):
+        (pool / folder).mkdir(parents=True)
+        (pool / folder / "index.html").write_text("<html></html>")
+    monkeypatch.setattr(main, "CONTENT_POOL", str(pool))
+    monkeypatch.setattr(main, "OUTPUT_DIR", str(output))
+    monkeypatch.setattr(main, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(main, "JOURNAL_DIR", str(output / "journal"))
+    monkeypatch.setattr(main, "LEDGER_DB", str(tmp_path / "data" / "ledger.sqlite3"))
+    monkeypatch.setattr(main, "LEDGER_EXPORT", str(tmp_path / "data" / "ledger.json"))
+    monkeypatch.setattr(main, "start_profiler", lambda: start_profiler(enabled=False))
+    monkeypatch.setattr(main, "run_audio", lambda paths, script: (5, False))
+    monkeypatch.setattr(main, "run_creative", lambda paths, script: {})
+
+    crash = {"b": RuntimeError("browser crashed"), "c": KeyboardInterrupt()}
+
+    def run_record(paths, duration, overlays):
+        folder = os.path.basename(paths["folder"])
+        if folder in crash:
+            time.sleep(0.2)  # partial work that must not end up in the ledger
+            raise crash.pop(folder)
+        with open(paths["raw_video"], "wb") as f:
+            f.write(b"x" * 100)
+        return True
+
+    monkeypatch.setattr(main, "run_record", run_record)
+
+    # First session: a publishes, b fails, c is interrupted and kills the batch
+    with pytest.raises(KeyboardInterrupt):
+        main.cmd_render(main.build_parser().parse_args(["render", "a", "b", "c"]))
+    # Second session picks the same journal (and run id) up
+    main.cmd_render(main.build_parser().parse_args(["render", "--resume"]))
+
+    with open(tmp_path / "data" / "ledger.json") as f:
+        runs = json.load(f)["folder_runs"]
+    assert sorted(r["folder"] for r in runs) == ["a", "b", "c"]
+    assert len({r["run_id"] for r in runs}) == 1
+    assert all(r["outcome"] == "published" for r in runs)
+    for r in runs:
+        assert set(r["stages"]) == {"audio", "creative", "record", "finalize", "folder"}
+        assert r["stages"]["record"] < 0.15
+        assert r["stages"]["folder"] >= sum(v for k, v in r["stages"].items() if k != "folder") - 0.01
+        assert set(r["artifacts"]) == {"raw", "final"}
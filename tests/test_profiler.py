@@ -0,0 +1,83 @@
+import os
+import json
+import time
+
+import pytest
+
+from profiler import Profiler
+
+
+def test_nested_stages_record_once_each():
+    profiler = Profiler(enabled=True)
+    with profiler.folder_scope("a"):
+        with profiler.stage("record"):
+            with profiler.stage("choreography"):
+                time.sleep(0.01)
+
+    records = {r["stage"]: r for r in profiler.records}
+    assert sorted(records) == ["choreography", "folder", "record"]
+    assert all(r["folder"] == "a" for r in records.values())
+    assert records["record"]["wall_s"] >= records["choreography"]["wall_s"] > 0
+    assert records["folder"]["wall_s"] >= records["record"]["wall_s"]
+    for r in records.values():
+        assert r["peak_rss_mb"] >= 0 and r["child_peak_rss_mb"] >= 0
+
+
+def test_parent_peak_rss_covers_child_stage():
+    profiler = Profiler(enabled=True)
+    with profiler.stage("outer"):
+        with profiler.stage("inner"):
+            block = bytearray(64 * 1024 * 1024)
+            block[::4096] = b"1" * len(block[::4096])
+            del block
+        with profiler.stage("after"):
+            pass
+
+    records = {r["stage"]: r for r in profiler.records}
+    assert records["outer"]["peak_rss_mb"] >= records["inner"]["peak_rss_mb"]
+    if os.path.exists("/proc/self/clear_refs"):
+        # Per-stage reset: the 64 MB of "inner" doesn't leak into the next stage
+        assert records["after"]["peak_rss_mb"] < records["inner"]["peak_rss_mb"] - 32
+
+
+def test_stage_that_raises_records_error():
+    profiler = Profiler(enabled=True)
+    with pytest.raises(ValueError):
+        with profiler.stage("encode"):
+            raise ValueError("bad codec")
+    assert profiler.records[0]["stage"] == "encode"
+    assert profiler.records[0]["error"] == "ValueError"
+    assert "(ValueError)" in profiler.summary_table()
+
+
+def test_disabled_profiler_is_a_no_op(tmp_path):
+    profiler = Profiler(enabled=False)
+    with profiler.folder_scope("a"):
+        with profiler.stage("record"):
+            pass
+    profiler.record_metrics({"page_fps": 30})
+    assert profiler.records == [] and profiler.events == [] and profiler.metrics == {}
+    assert profiler.write(str(tmp_path)) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_write_produces_trace_and_summary(tmp_path):
+    profiler = Profiler(enabled=True)
+    with profiler.folder_scope("a"):
+        with profiler.stage("tts"):
+            pass
+        profiler.record_metrics({"page_fps": 29.5, "scroll_pipeline_ok": True})
+
+    trace_path = profiler.write(str(tmp_path))
+    assert os.path.basename(trace_path).startswith("trace_")
+    with open(trace_path) as f:
+        trace = json.load(f)
+    phases = [e["ph"] for e in trace["traceEvents"]]
+    assert phases.count("X") == 2 and "M" in phases
+    counters = [e for e in trace["traceEvents"] if e["ph"] == "C"]
+    assert counters[0]["args"] == {"page_fps": 29.5}  # bools are not plotted
+    assert trace["metadata"]["browser_metrics"] == {"a": {"page_fps": 29.5, "scroll_pipeline_ok": True}}
+
+    with open(tmp_path / "profile_summary.txt") as f:
+        summary = f.read()
+    assert "tts" in summary and "TOTAL a" in summary and "page_fps" in summary
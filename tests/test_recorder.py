@@ -0,0 +1,66 @@
+import asyncio
+
+from recorder import DETECT_SCROLL_JS, SCROLL_DRIVER_JS, HumanScroller, assess_scroll_pipeline, install_scroll_driver
+
+TARGET_FPS = 30
+
+
+class FakeFrame:
+    """Stands in for a Playwright frame: canned evaluate() results, or an error."""
+    def __init__(self, results=None, error=None):
+        self.results = results or {}
+        self.error = error
+        self.styles = []
+
+    async def evaluate(self, script, *args):
+        if self.error:
+            raise self.error
+        return self.results[script]
+
+    async def add_style_tag(self, content):
+        self.styles.append(content)
+
+
+def test_healthy_pipeline_is_ok():
+    metrics = {"page_fps": 29.0, "scroll_ticks": 100, "scroll_ticks_over_budget": 10}
+    assert assess_scroll_pipeline(metrics, TARGET_FPS, {}) is True
+    assert metrics["scroll_pipeline_ok"] is True
+
+
+def test_page_fps_below_90_percent_of_target_is_flagged():
+    metrics = {"page_fps": 26.9, "scroll_ticks": 100, "scroll_ticks_over_budget": 0}
+    assert assess_scroll_pipeline(metrics, TARGET_FPS, {"scrollTriggers": 4}) is False
+    assert metrics["scroll_pipeline_ok"] is False
+
+
+def test_more_than_10_percent_ticks_over_budget_is_flagged():
+    metrics = {"page_fps": 30.0, "scroll_ticks": 100, "scroll_ticks_over_budget": 11}
+    assert assess_scroll_pipeline(metrics, TARGET_FPS, {}) is False
+
+
+def test_no_ticks_and_no_frame_stats_are_not_flagged():
+    metrics = {"scroll_ticks": 0}
+    assert assess_scroll_pipeline(metrics, TARGET_FPS, {}) is True
+    assert assess_scroll_pipeline({}, TARGET_FPS, {}) is True
+
+
+def test_scroll_ticks_over_frame_budget_are_counted():
+    scroller = HumanScroller(page=None, frame=None, wrapper_offset={"x": 0, "y": 0}, scale_factor=1)
+    scroller.record_tick(0.01)
+    scroller.record_tick(scroller.DT * 2)
+    stats = scroller.tick_stats()
+    assert (stats["scroll_ticks"], stats["scroll_ticks_over_budget"]) == (2, 1)
+    assert stats["scroll_tick_avg_ms"] == round(1000 * (0.01 + 2 * scroller.DT) / 2, 2)
+
+
+def test_install_scroll_driver_falls_back_to_native_when_evaluate_raises():
+    frame = FakeFrame(error=RuntimeError("Execution context was destroyed"))
+    assert asyncio.run(install_scroll_driver(frame)) == ("native", {})
+
+
+def test_install_scroll_driver_reports_library_driver():
+    libs = {"lenis": True, "lenisInstances": 1, "locomotive": False, "scrollSmoother": False,
+            "scrollTriggers": 0, "cssSmooth": True}
+    frame = FakeFrame({DETECT_SCROLL_JS: libs, SCROLL_DRIVER_JS: "lenis"})
+    assert asyncio.run(install_scroll_driver(frame)) == ("lenis", libs)
+    assert any("scroll-behavior: auto" in css for css in frame.styles)